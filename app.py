@@ -1,10 +1,24 @@
+# 起動プロファイル（STARTUP_PROFILE=1）でstreamlitを含む以降の読み込み時間も測れるよう、最初に読み込む
+from utils.profiler import profiler
+profiler.start_run()
 import streamlit as st
 import pandas as pd
-import json
+import math
 from datetime import datetime
-from utils.logo_fetcher import fetch_company_logo
-from utils.url_fetcher import fetch_company_url
-from utils.data_manager import load_data, save_data, add_startup
+from utils.data_manager import SharedDataset, data_version, restore_points, state_at
+from utils.journal import JournalError
+from utils.views import get_views, shared_views, STATUSES, ACTIVE_STATUSES, COMPLETED_STATUSES
+from utils.search_index import MAX_CANDIDATES
+from utils.resolution_cache import get_cache, MISS
+from utils.metrics import metrics, METRICS_FILE
+from utils.activity_log import append_log, has_logs, open_log_stream
+from utils.exporter import EXPORT_FORMATS, export_startups, open_stream
+from utils.logo_store import load_logo
+from utils.importer import import_startups, RestoreError, MODE_MERGE, MODE_REPLACE
+from utils.link_health import LinkHealthScheduler, is_broken
+from utils.analytics import get_analytics
+from utils.enrichment import EnrichmentQueue, ENRICHMENT_PENDING, ENRICHMENT_RUNNING, ENRICHMENT_DONE, ENRICHMENT_FAILED
+profiler.mark("モジュールの読み込み")
 
 # ページ設定
 st.set_page_config(
@@ -13,6 +27,41 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_resource
+def get_dataset():
+    """全セッションで共有するスタートアップ一覧"""
+    return SharedDataset()
+
+def patch_shared(patches):
+    """
+    保存済みのレコードの一部の項目を更新し、共有の一覧と集計に差分で反映する
+    （バックグラウンドの補完・リンク確認の書き戻しで、全セッションが全件を読み込み直さないようにする）
+    """
+    previous_version = data_version()
+    changed = get_dataset().patch(patches)
+    shared_views().apply_patch(changed, previous_version, data_version())
+    return len(changed)
+
+@st.cache_resource
+def get_enrichment_queue():
+    """全セッションで共有するHP・ロゴ補完キュー"""
+    queue = EnrichmentQueue(patch=patch_shared)
+    queue.resume_pending(get_dataset().snapshot()[0])
+    return queue
+
+@st.cache_resource
+def get_link_health_scheduler():
+    """保存済みのHP・ロゴURLを少しずつ再確認するスケジューラ（全セッションで1つ）"""
+    return LinkHealthScheduler(lambda: get_dataset().snapshot()[0], patch=patch_shared).start()
+
+# カード一覧の1ページあたりの表示件数（3列グリッドなので3の倍数）
+CARDS_PER_PAGE = 12
+
+@st.cache_data(max_entries=1024)
+def get_logo_bytes(logo_path):
+    """保存済みロゴを読み込む（内容ハッシュのパスなのでキャッシュしても内容は変わらない）"""
+    return load_logo(logo_path)
+
 # 統合ログ管理関数を追加
 def save_activity_log(action, data, additional_info=None):
     """アクティビティログを保存（追加、編集、削除などすべてのアクション）"""
@@ -25,50 +74,48 @@ def save_activity_log(action, data, additional_info=None):
     if additional_info:
         log_entry.update(additional_info)
     
-    # ログファイルの読み込み（存在しない場合は空リスト）
-    try:
-        with open('data/activity_logs.json', 'r', encoding='utf-8') as f:
-            logs = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        logs = []
-    
-    # 新しいログエントリを追加
-    logs.append(log_entry)
-    
-    # ログファイルに保存
-    import os
-    os.makedirs('data', exist_ok=True)
-    with open('data/activity_logs.json', 'w', encoding='utf-8') as f:
-        json.dump(logs, f, ensure_ascii=False, indent=2)
+    # 追記専用のログファイルに1行書き込む
+    append_log(log_entry)
 
 # 関数定義（先頭に移動）
 def calculate_days_since_creation(startup):
-    """作成日からの経過日数を計算"""
-    try:
-        if startup.get('created_at'):
-            created_date = datetime.fromisoformat(startup['created_at'].replace('Z', '+00:00'))
-            return (datetime.now() - created_date).days
-    except:
-        pass
-    return 0
-
-def calculate_avg_days_since_creation(startups_list):
-    """平均経過日数を計算"""
-    if not startups_list:
+    """作成日からの経過日数を計算（作成日時は読み込み時に解析済み）"""
+    if startup.created is None:
         return 0
-    
-    total_days = sum(calculate_days_since_creation(s) for s in startups_list)
-    return round(total_days / len(startups_list), 1)
+    return (datetime.now() - startup.created).days
 
-def display_startup_cards(filtered_startups, all_startups, tab_type):
+def search_startups(views, query, statuses=None):
+    """会社名で検索する（一致が多すぎて候補を打ち切った場合はその旨を表示する）"""
+    results, truncated = views.search(query, statuses)
+    if truncated:
+        st.caption(f"一致する会社が多いため、登録の新しい{MAX_CANDIDATES}件の候補から表示しています。検索語を長くすると絞り込めます。")
+    return results
+
+def display_startup_cards(filtered_startups, tab_type):
     """スタートアップカードを表示する関数"""
     if not filtered_startups:
         st.info("条件に一致するスタートアップがありません。")
         return
     
+    # ページ分割（表示中のページのカードだけを描画する）
+    total_pages = max(1, math.ceil(len(filtered_startups) / CARDS_PER_PAGE))
+    page_key = f"page_{tab_type}"
+    if st.session_state.get(page_key, 1) > total_pages:
+        st.session_state[page_key] = total_pages
+    page = 1
+    if total_pages > 1:
+        page = st.number_input(
+            f"ページ（全{total_pages}ページ / {len(filtered_startups)}件）",
+            min_value=1, max_value=total_pages, step=1, key=page_key
+        )
+    start = (page - 1) * CARDS_PER_PAGE
+    page_startups = filtered_startups[start:start + CARDS_PER_PAGE]
+    
     # グリッドレイアウト
     cols = st.columns(3)
-    for i, startup in enumerate(filtered_startups):
+    for i, startup in enumerate(page_startups):
+        # ウィジェットのキーはレコードIDで固定する（一覧が増減してもずれない）
+        card_key = f"{tab_type}_{startup['id']}"
         with cols[i % 3]:
             with st.container():
                 # ステータスに応じた色分け
@@ -88,8 +135,20 @@ def display_startup_cards(filtered_startups, all_startups, tab_type):
                 
                 st.markdown(title)
                 
-                # ロゴ表示
-                if startup.get('logo_url'):
+                # HP・ロゴの補完状況
+                enrichment_status = startup.get('enrichment_status')
+                if enrichment_status in (ENRICHMENT_PENDING, ENRICHMENT_RUNNING):
+                    st.caption("⏳ HP・ロゴを取得中...")
+                elif enrichment_status == ENRICHMENT_FAILED:
+                    st.caption("⚠️ HP・ロゴの取得に失敗しました")
+                
+                # ロゴ表示（ローカルに保存したサムネイルを優先する）
+                logo_bytes = get_logo_bytes(startup.get('logo_path'))
+                if logo_bytes:
+                    st.image(logo_bytes, width=100)
+                elif startup.get('logo_url') and not is_broken(startup, 'logo_url'):
+                    # 未保存のロゴはバックグラウンドで保存しておく
+                    get_enrichment_queue().submit_logo(startup)
                     try:
                         st.image(startup['logo_url'], width=100)
                     except:
@@ -98,14 +157,15 @@ def display_startup_cards(filtered_startups, all_startups, tab_type):
                     st.write("🏢 ロゴ未取得")
                 
                 st.write(f"**HP:** {startup.get('hp', 'N/A')}")
+                if is_broken(startup, 'hp'):
+                    st.caption("⚠️ HPに接続できない状態が続いています")
                 st.write(f"**メール:** {startup.get('email', 'N/A')}")
                 st.write(f"**ステータス:** {startup['status']}") 
                 st.write(f"**企業概要:** {startup.get('overview', 'N/A')}")
                 
                 # 作成日・更新日
-                if startup.get('created_at'):
-                    created_date = datetime.fromisoformat(startup['created_at'].replace('Z', '+00:00'))
-                    st.write(f"**登録日:** {created_date.strftime('%Y-%m-%d')}")
+                if startup.created is not None:
+                    st.write(f"**登録日:** {startup.created.strftime('%Y-%m-%d')}")
                 
                 if startup.get('notes'):
                     with st.expander("メモを見る"):
@@ -114,18 +174,19 @@ def display_startup_cards(filtered_startups, all_startups, tab_type):
                 # 編集・削除ボタン
                 col_edit, col_delete = st.columns(2)
                 with col_edit:
-                    if st.button(f"編集", key=f"edit_{tab_type}_{i}"):
+                    if st.button(f"編集", key=f"edit_{card_key}"):
                         st.info("編集機能は開発中です")
                 with col_delete:
-                    if st.button(f"削除", key=f"delete_{tab_type}_{i}"):
-                        if st.session_state.get(f"confirm_delete_{tab_type}_{i}"):
+                    if st.button(f"削除", key=f"delete_{card_key}"):
+                        if st.session_state.get(f"confirm_delete_{card_key}"):
                             # 削除ログを保存
-                            save_activity_log("delete_startup", startup, {"company_name": startup["company_name"]})
-                            all_startups.remove(startup)
-                            save_data(all_startups)
+                            save_activity_log("delete_startup", startup.to_dict(), {"company_name": startup["company_name"]})
+                            previous_version = data_version()
+                            get_dataset().delete(startup)
+                            views.apply_delete(startup, previous_version, data_version())
                             st.rerun()
                         else:
-                            st.session_state[f"confirm_delete_{tab_type}_{i}"] = True
+                            st.session_state[f"confirm_delete_{card_key}"] = True
                             st.warning("もう一度クリックして削除を確認してください")
                 
                 st.divider()
@@ -133,107 +194,261 @@ def display_startup_cards(filtered_startups, all_startups, tab_type):
 # メインアプリケーション開始
 st.title("🚀 Startup Contact Dashboard")
 
-# データ読み込み
-startups = load_data()
+# データ読み込み（変更がなければファイルを読まずに共有の一覧を使う）
+startups, version = get_dataset().snapshot()
+views = get_views(startups, version)
+profiler.mark("データ読み込み")
+
+# 中断していたHP・ロゴ補完を再開するため、補完キューを起動しておく
+get_enrichment_queue()
+get_link_health_scheduler()
+profiler.mark("バックグラウンド処理の起動")
 
 # サイドバー - 新しいスタートアップ追加
 st.sidebar.header("新しいスタートアップを追加")
 
 with st.sidebar.form("add_startup"):
     company_name = st.text_input("会社名")
+    hp = st.text_input("HP（任意）")
     email = st.text_input("メールアドレス")
-    status = st.selectbox("ステータス", ["初期接触", "商談中", "保留", "成約", "見送り"])
+    status = st.selectbox("ステータス", STATUSES)
     overview = st.text_area("概要")
     notes = st.text_area("メモ")
+    allow_duplicate = st.checkbox("重複の可能性があっても追加する")
     
     if st.form_submit_button("追加"):
         if company_name:
-            # ロゴを自動取得
-            with st.spinner(f"{company_name}のロゴを取得中..."):
-                logo_url = fetch_company_logo(company_name)
-                hp_url = fetch_company_url(company_name)
-            
-            startup_data = {
-                "company_name": company_name,
-                "hp": hp_url,
-                "email": email,
-                "status": status,
-                "overview": overview,
-                "notes": notes,
-                "logo_url": logo_url,
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat()
-            }
+            # 会社名・HPのドメインで既存レコードとの重複を確認する（HP未入力の場合は取得済みのURLを使う）
+            known_hp = hp or None
+            if known_hp is None:
+                cached_hp = get_cache().get("url", company_name)
+                if cached_hp is not MISS:
+                    known_hp = cached_hp
+            duplicate = views.find_duplicate(company_name, known_hp)
             
-            add_startup(startups, startup_data)
-            save_data(startups)
-            
-            # 統合ログに保存
-            save_activity_log("add_startup", startup_data, {"company_name": company_name})
-            
-            st.sidebar.success(f"{company_name} を追加しました！")
-            st.rerun()
+            if duplicate is not None and not allow_duplicate:
+                st.sidebar.warning(
+                    f"「{duplicate['company_name']}」と同じ会社の可能性があります。"
+                    "追加する場合は「重複の可能性があっても追加する」にチェックしてください"
+                )
+            else:
+                # HP・ロゴはバックグラウンドで取得し、レコードはすぐに保存する
+                startup_data = {
+                    "company_name": company_name,
+                    "hp": hp or None,
+                    "email": email,
+                    "status": status,
+                    "overview": overview,
+                    "notes": notes,
+                    "logo_url": None,
+                    "enrichment_status": ENRICHMENT_PENDING,
+                    "created_at": datetime.now().isoformat(),
+                    "updated_at": datetime.now().isoformat()
+                }
+                # 重複と分かっている場合は既存レコードの取得結果を使い、HP・ロゴの取得は行わない
+                if duplicate is not None:
+                    startup_data["duplicate_of"] = duplicate["id"]
+                    if duplicate.get("enrichment_status") == ENRICHMENT_DONE:
+                        startup_data.update({
+                            "hp": hp or duplicate.get("hp"),
+                            "logo_url": duplicate.get("logo_url"),
+                            "logo_path": duplicate.get("logo_path"),
+                            "enrichment_status": ENRICHMENT_DONE,
+                        })
+                
+                previous_version = data_version()
+                startup = get_dataset().add(startup_data)
+                views.apply_add(startup, previous_version, data_version())
+                if startup_data["enrichment_status"] == ENRICHMENT_PENDING:
+                    get_enrichment_queue().submit(startup)
+                
+                # 統合ログに保存
+                # 分析タブで段階ごとの滞在期間を追えるよう、採番済みのIDを含めて記録する
+                save_activity_log("add_startup", startup.to_dict(), {"company_name": company_name})
+                
+                st.sidebar.success(f"{company_name} を追加しました！HP・ロゴは自動で取得されます")
+                st.rerun()
+
+profiler.mark("サイドバー: 追加フォーム")
 
 # デバッグ情報（開発時のみ表示）
 if st.sidebar.checkbox("デバッグ情報を表示"):
     import os
+    # host_guardはrequestsを読み込むので、デバッグ情報を表示するときだけ読み込む
+    from utils.host_guard import get_host_guard
     st.sidebar.write("**ファイルパス情報:**")
     st.sidebar.write(f"現在のディレクトリ: `{os.getcwd()}`")
     st.sidebar.write(f"dataフォルダ存在: {os.path.exists('data')}")
+    st.sidebar.write(f"HP・ロゴ取得待ち: {get_enrichment_queue().pending_count()}件")
+    link_scheduler = get_link_health_scheduler()
+    last_link_check = link_scheduler.last_run.strftime('%H:%M:%S') if link_scheduler.last_run else "未実行"
+    st.sidebar.write(f"リンク再確認: {link_scheduler.checked}件（最終実行: {last_link_check}）")
     st.sidebar.write(f"startups.json存在: {os.path.exists('data/startups.json')}")
-    st.sidebar.write(f"activity_logs.json存在: {os.path.exists('data/activity_logs.json')}")
+    st.sidebar.write(f"startups.db存在: {os.path.exists('data/startups.db')}")
+    st.sidebar.write(f"activity_logs.jsonl存在: {os.path.exists('data/activity_logs.jsonl')}")
+    
+    # URL・ロゴ取得のステージ別メトリクス
+    st.sidebar.write("**取得メトリクス:**")
+    metric_rows = metrics.rows()
+    if metric_rows:
+        st.sidebar.dataframe(pd.DataFrame(metric_rows), hide_index=True)
+    else:
+        st.sidebar.write("まだ記録がありません")
+    if st.sidebar.button("メトリクスを書き出す", key="metrics_snapshot"):
+        metrics.write_snapshot()
+        st.sidebar.success(f"{METRICS_FILE} に書き出しました")
+    
+    # ホストごとの流量制限・遮断の状態
+    st.sidebar.write("**流量制限・遮断:**")
+    guard_rows = get_host_guard().rows()
+    if guard_rows:
+        st.sidebar.dataframe(pd.DataFrame(guard_rows), hide_index=True)
+    else:
+        st.sidebar.write("まだ記録がありません")
+    if st.sidebar.button("遮断を解除", key="host_guard_reset"):
+        get_host_guard().reset()
+        st.sidebar.success("全ホストの流量制限・遮断の状態を消去しました")
+    
+    # URL・ロゴ取得キャッシュ
+    cache = get_cache()
+    st.sidebar.write("**取得キャッシュ:**")
+    st.sidebar.write(cache.stats())
+    invalidate_name = st.sidebar.text_input("キャッシュを削除する会社名", key="cache_invalidate_name")
+    col_inv, col_clear = st.sidebar.columns(2)
+    with col_inv:
+        if st.button("会社を削除", key="cache_invalidate") and invalidate_name:
+            cache.invalidate(invalidate_name)
+            st.sidebar.success(f"{invalidate_name} のキャッシュを削除しました")
+    with col_clear:
+        if st.button("全て削除", key="cache_clear"):
+            cache.invalidate()
+            st.sidebar.success("キャッシュを全て削除しました")
+
+profiler.mark("サイドバー: デバッグ情報")
 
 # データのバックアップ・復元機能
 st.sidebar.markdown("---")
 st.sidebar.subheader("データ管理")
 
 # データダウンロード（統合版）
+# 出力形式と対象（一覧タブで選択中のステータスを既定にする）
+export_format = st.sidebar.selectbox("出力形式", list(EXPORT_FORMATS), key="export_format")
+export_scopes = {"全て": None, "アクティブ案件": ACTIVE_STATUSES, "完了案件": COMPLETED_STATUSES}
+export_scopes.update({status: [status] for status in STATUSES})
+export_scope_names = list(export_scopes)
+current_filter = st.session_state.get("all_status_filter", "全て")
+export_scope = st.sidebar.selectbox(
+    "出力対象", export_scope_names,
+    index=export_scope_names.index(current_filter) if current_filter in export_scope_names else 0,
+    key="export_scope"
+)
+
 col1, col2 = st.sidebar.columns(2)
 with col1:
-    if st.button("データDL"):
-        if startups:
-            json_str = json.dumps(startups, ensure_ascii=False, indent=2)
-            st.sidebar.download_button(
-                label="startups.json",
-                data=json_str,
-                file_name="startups_backup.json",
-                mime="application/json",
-                key="download_data"
-            )
-        else:
-            st.sidebar.warning("データがありません")
+    if startups:
+        _, export_ext, export_mime = EXPORT_FORMATS[export_format]
+        export_statuses = export_scopes[export_scope]
+        # クリックされたときにストレージからバッチ単位で読み出して出力する
+        st.download_button(
+            label="データDL",
+            data=lambda fmt=export_format, statuses=export_statuses: open_stream(export_startups(fmt, statuses)),
+            file_name=f"startups_backup.{export_ext}",
+            mime=export_mime,
+            key="download_data"
+        )
+    else:
+        st.button("データDL", disabled=True)
 
 with col2:
     if st.button("ログDL"):
-        try:
-            with open('data/activity_logs.json', 'r', encoding='utf-8') as f:
-                logs = json.load(f)
-            if logs:
-                json_str = json.dumps(logs, ensure_ascii=False, indent=2)
-                st.sidebar.download_button(
-                    label="activity_logs.json",
-                    data=json_str,
-                    file_name="activity_logs_backup.json",
-                    mime="application/json",
-                    key="download_logs"
-                )
-            else:
-                st.sidebar.warning("ログがありません")
-        except FileNotFoundError:
-            st.sidebar.warning("ログファイルが見つかりません")
+        if has_logs():
+            st.sidebar.download_button(
+                label="activity_logs.jsonl",
+                data=open_log_stream(),
+                file_name="activity_logs_backup.jsonl",
+                mime="application/x-ndjson",
+                key="download_logs"
+            )
+        else:
+            st.sidebar.warning("ログがありません")
 
-uploaded_file = st.sidebar.file_uploader("データをアップロード", type=['json'])
+uploaded_file = st.sidebar.file_uploader("データをアップロード", type=['json', 'jsonl', 'ndjson'])
 if uploaded_file is not None:
-    try:
-        uploaded_data = json.load(uploaded_file)
-        if st.sidebar.button("データを復元"):
-            save_data(uploaded_data)
+    restore_mode = st.sidebar.radio(
+        "復元方法",
+        [MODE_MERGE, MODE_REPLACE],
+        format_func=lambda mode: {MODE_MERGE: "既存データに追加", MODE_REPLACE: "既存データを置き換え"}[mode],
+        key="restore_mode"
+    )
+    if st.sidebar.button("データを復元"):
+        progress_bar = st.sidebar.progress(0.0)
+
+        def show_progress(fraction, result):
+            progress_bar.progress(fraction, text=f"{result['imported']}件を取り込みました")
+
+        try:
+            uploaded_file.seek(0)
+            result = import_startups(uploaded_file, restore_mode, progress=show_progress, total_bytes=uploaded_file.size)
+        except RestoreError as e:
+            # ファイル全体が読めない場合は何も書き込まれていない
+            st.sidebar.error(f"ファイル読み込みエラー: {e}")
+        else:
             # データ復元ログを保存
-            save_activity_log("restore_data", {"restored_count": len(uploaded_data)})
-            st.sidebar.success("データを復元しました！")
+            save_activity_log("restore_data", {
+                "restored_count": result["imported"],
+                "skipped_count": result["skipped"],
+                "error_count": result["error_count"],
+                "mode": restore_mode,
+            })
+            st.session_state.restore_result = result
             st.rerun()
-    except Exception as e:
-        st.sidebar.error(f"ファイル読み込みエラー: {e}")
+
+# 直前の復元結果（再実行後も表示する）
+restore_result = st.session_state.pop("restore_result", None)
+if restore_result is not None:
+    st.sidebar.success(
+        f"データを復元しました！（取り込み {restore_result['imported']}件 / "
+        f"重複スキップ {restore_result['skipped']}件 / エラー {restore_result['error_count']}件）"
+    )
+    if restore_result["errors"]:
+        with st.sidebar.expander("エラーの詳細"):
+            for index, message in restore_result["errors"]:
+                st.write(f"{index}件目: {message}")
+            if restore_result["error_count"] > len(restore_result["errors"]):
+                st.write(f"ほか {restore_result['error_count'] - len(restore_result['errors'])}件")
+
+# 時点を指定した復元（スナップショットと差分ログから、その時点の全件を作り直す）
+with st.sidebar.expander("時点を指定して復元"):
+    points = restore_points()
+    if points["oldest"] is None:
+        st.write("まだスナップショットがありません")
+    else:
+        st.caption(f"{points['oldest']:%Y-%m-%d %H:%M} 以降の時点に戻せます（スナップショット {points['snapshots']}件）")
+        restore_date = st.date_input("日付", value=datetime.now().date(), key="pit_date")
+        restore_time = st.time_input("時刻", value=datetime.now().time().replace(second=0, microsecond=0), key="pit_time")
+        if st.button("この時点に戻す", key="pit_restore"):
+            restore_at = datetime.combine(restore_date, restore_time)
+            try:
+                restored = state_at(restore_at)
+                # 戻した結果も新しいスナップショットとして残るので、さらに前後の時点にも戻せる
+                # バックグラウンドの補完・リンク確認でバージョンが進んでいても戻せるよう、バージョンは確認しない
+                get_dataset().restore(restored)
+            except JournalError as e:
+                st.error(str(e))
+            else:
+                save_activity_log("restore_data", {
+                    "restored_count": len(restored),
+                    "mode": "point_in_time",
+                    "restored_at": restore_at.isoformat(),
+                })
+                st.session_state.pit_result = (restore_at, len(restored))
+                st.rerun()
+
+pit_result = st.session_state.pop("pit_result", None)
+if pit_result is not None:
+    st.sidebar.success(f"{pit_result[0]:%Y-%m-%d %H:%M} 時点のデータ（{pit_result[1]}件）に戻しました")
+
+profiler.mark("サイドバー: データ管理")
 
 # メインエリア - タブ機能
 if startups:
@@ -241,17 +456,16 @@ if startups:
     st.subheader("📊 統計情報")
     col1, col2, col3, col4 = st.columns(4)
     
-    # アクティブ案件の定義（保留を含む）
-    active_startups = [s for s in startups if s["status"] in ["初期接触", "商談中", "保留"]]
-    success_count = len([s for s in startups if s["status"] == "成約"])
+    # ステータス別の振り分け・件数はデータが変わるまで使い回す
+    active_startups = views.active
     
     with col1:
-        st.metric("総スタートアップ数", len(startups))
+        st.metric("総スタートアップ数", views.total)
     with col2:
-        st.metric("アクティブ案件", len(active_startups))
+        st.metric("アクティブ案件", views.active_count)
   
     # タブの作成
-    tab1, tab2, tab3 = st.tabs(["📋 全スタートアップ", "🔥 アクティブ案件", "📈 完了案件"])
+    tab1, tab2, tab3, tab4 = st.tabs(["📋 全スタートアップ", "🔥 アクティブ案件", "📈 完了案件", "📊 分析"])
     
     # タブ1: 全スタートアップ
     with tab1:
@@ -261,7 +475,7 @@ if startups:
         col1, col2 = st.columns([1, 1])
         with col1:
             status_filter = st.selectbox("ステータスでフィルター", 
-                                       ["全て"] + list(set([s["status"] for s in startups])),
+                                       ["全て"] + views.statuses,
                                        key="all_status_filter")
         with col2:
             search_term = st.text_input("会社名で検索", key="all_search")
@@ -269,12 +483,15 @@ if startups:
         # フィルタリング
         filtered_startups = startups
         if status_filter != "全て":
-            filtered_startups = [s for s in filtered_startups if s["status"] == status_filter]
+            filtered_startups = views.filter([status_filter])
         if search_term:
-            filtered_startups = [s for s in filtered_startups if search_term.lower() in s["company_name"].lower()]
+            # 全角半角・カナ・法人格の違いを吸収した索引で関連度順に検索する
+            filtered_startups = search_startups(views, search_term, None if status_filter == "全て" else [status_filter])
 
-        display_startup_cards(filtered_startups, startups, "all")
+        display_startup_cards(filtered_startups, "all")
     
+    profiler.mark("タブ: 全スタートアップ")
+
     # タブ2: アクティブ案件のみ
     with tab2:
         st.subheader("🔥 アクティブ案件（進行中）")
@@ -283,86 +500,118 @@ if startups:
             # アクティブ案件の詳細統計
             col1, col2, col3, col4 = st.columns(4)
             with col1:
-                initial_count = len([s for s in active_startups if s["status"] == "初期接触"])
-                st.metric("初期接触", initial_count)
+                st.metric("初期接触", views.count("初期接触"))
             with col2:
-                negotiation_count = len([s for s in active_startups if s["status"] == "商談中"])
-                st.metric("商談中", negotiation_count)
+                st.metric("商談中", views.count("商談中"))
             with col3:
-                hold_count = len([s for s in active_startups if s["status"] == "保留"])
-                st.metric("保留", hold_count)
+                st.metric("保留", views.count("保留"))
             with col4:
-                avg_days = calculate_avg_days_since_creation(active_startups)
-                st.metric("平均経過日数", f"{avg_days}日")
+                st.metric("平均経過日数", f"{views.avg_active_days}日")
             
             # アクティブ案件用フィルター
             col1, col2 = st.columns([1, 1])
             with col1:
                 active_status_filter = st.selectbox("アクティブステータス", 
-                                                  ["全て", "初期接触", "商談中", "保留"],
+                                                  ["全て"] + ACTIVE_STATUSES,
                                                   key="active_status_filter")
             with col2:
                 active_search_term = st.text_input("会社名で検索", key="active_search")
 
             # アクティブ案件のフィルタリング
-            filtered_active = active_startups
-            if active_status_filter != "全て":
-                filtered_active = [s for s in filtered_active if s["status"] == active_status_filter]
+            active_statuses = ACTIVE_STATUSES if active_status_filter == "全て" else [active_status_filter]
+            filtered_active = views.filter(active_statuses)
             if active_search_term:
-                filtered_active = [s for s in filtered_active if active_search_term.lower() in s["company_name"].lower()]
+                filtered_active = search_startups(views, active_search_term, active_statuses)
 
             # 優先度順でソート（商談中 > 初期接触 > 保留）
             priority_order = {"商談中": 1, "初期接触": 2, "保留": 3}
-            filtered_active.sort(key=lambda x: priority_order.get(x["status"], 4))
+            filtered_active = sorted(filtered_active, key=lambda x: priority_order.get(x["status"], 4))
             
             st.info(f"📊 アクティブ案件 {len(filtered_active)} 件を表示中（優先度順）")
             
-            display_startup_cards(filtered_active, startups, "active")
+            display_startup_cards(filtered_active, "active")
         else:
             st.info("現在アクティブな案件はありません。")
     
+    profiler.mark("タブ: アクティブ案件")
+
     # タブ3: 完了案件
     with tab3:
         st.subheader("📈 完了案件")
         
-        completed_startups = [s for s in startups if s["status"] in ["成約", "見送り"]]
+        completed_startups = views.completed
         
         if completed_startups:
             # 完了案件の統計
             col1, col2, col3 = st.columns(3)
             with col1:
-                success_count = len([s for s in completed_startups if s["status"] == "成約"])
-                st.metric("成約", success_count)
+                st.metric("成約", views.count("成約"))
             with col2:
-                rejected_count = len([s for s in completed_startups if s["status"] == "見送り"])
-                st.metric("見送り", rejected_count)
+                st.metric("見送り", views.count("見送り"))
             with col3:
-                completion_rate = f"{(success_count/len(completed_startups)*100):.1f}%" if completed_startups else "0%"
-                st.metric("成約率", completion_rate)
+                st.metric("成約率", f"{views.completion_rate:.1f}%")
             
             # 完了案件用フィルター
             col1, col2 = st.columns([1, 1])
             with col1:
                 completed_status_filter = st.selectbox("完了ステータス", 
-                                                     ["全て", "成約", "見送り"],
+                                                     ["全て"] + COMPLETED_STATUSES,
                                                      key="completed_status_filter")
             with col2:
                 completed_search_term = st.text_input("会社名で検索", key="completed_search")
 
             # 完了案件のフィルタリング
-            filtered_completed = completed_startups
-            if completed_status_filter != "全て":
-                filtered_completed = [s for s in filtered_completed if s["status"] == completed_status_filter]
+            completed_statuses = COMPLETED_STATUSES if completed_status_filter == "全て" else [completed_status_filter]
+            filtered_completed = views.filter(completed_statuses)
             if completed_search_term:
-                filtered_completed = [s for s in filtered_completed if completed_search_term.lower() in s["company_name"].lower()]
+                filtered_completed = search_startups(views, completed_search_term, completed_statuses)
 
-            display_startup_cards(filtered_completed, startups, "completed")
+            display_startup_cards(filtered_completed, "completed")
         else:
             st.info("完了した案件はありません。")
 
+    profiler.mark("タブ: 完了案件")
+
+    # タブ4: パイプライン分析
+    with tab4:
+        st.subheader("📊 パイプライン分析")
+        # 日次集計はアクティビティログの追記分だけを読んで更新する
+        analytics = get_analytics().compute(startups, version)
+
+        st.write("**ファネル（初期接触 → 商談中 → 成約）**")
+        funnel = analytics["funnel"]
+        col1, col2, col3 = st.columns(3)
+        for col, stage in zip([col1, col2, col3], funnel.index):
+            with col:
+                st.metric(stage, int(funnel.loc[stage, "到達数"]),
+                          f"{funnel.loc[stage, '前段階からの割合(%)']:.1f}%" if stage != funnel.index[0] else None)
+        st.dataframe(funnel)
+
+        st.write("**週ごとの追加・成約・見送り**")
+        if analytics["weekly"].empty:
+            st.info("まだアクティビティログがありません。")
+        else:
+            st.bar_chart(analytics["weekly"])
+
+        st.write("**段階ごとの滞在日数**")
+        st.dataframe(analytics["time_in_stage"])
+
+        st.write("**アクティブ案件の経過日数**")
+        st.bar_chart(analytics["aging"])
+
 else:
     st.info("まだスタートアップが登録されていません。サイドバーから追加してください。")
 
 # フッター
 st.markdown("---")
 st.markdown("Made with using Streamlit")
+profiler.mark("タブ: 分析・フッター")
+profiler.finish_run()
+
+# 起動プロファイル（STARTUP_PROFILE=1 のときだけ表示する）
+if profiler.enabled:
+    with st.sidebar.expander("起動プロファイル"):
+        st.write("**区間ごとの時間（起動時 / 直近の実行）**")
+        st.dataframe(pd.DataFrame(profiler.rows()), hide_index=True)
+        st.write("**読み込みに時間がかかったモジュール**")
+        st.dataframe(pd.DataFrame(profiler.import_rows()), hide_index=True)
@@ -0,0 +1,139 @@
+"""
+URL・ロゴ取得のオフラインベンチマーク
+
+ローカルのスタブサーバーにすべてのリクエストを転送し、会社名コーパスに対して
+fetch_company_url / fetch_company_logo を実行して、レイテンシ（p50/p95/p99）・
+プローブ数・スループットを計測する。ネットワーク接続は不要。
+
+使い方:
+    python benchmarks/bench_enrichment.py
+    python benchmarks/bench_enrichment.py --workers 4 --repeat 2 --json bench.json
+    python benchmarks/bench_enrichment.py --max-p95 3.0   # CIで回帰を検出（超えたら終了コード1）
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_server import FIXTURES_DIR, RoutingAdapter, ScenarioResolver, StubServer, load_scenario
+
+
+def load_corpus(path):
+    """1行1社のコーパスを読み込む（空行と#以降は無視）"""
+    names = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            name = line.split('#', 1)[0].strip()
+            if name:
+                names.append(name)
+    return names
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed, requests, hits):
+    return {
+        "lookups": len(latencies),
+        "hits": hits,
+        "p50": round(percentile(latencies, 50), 4),
+        "p95": round(percentile(latencies, 95), 4),
+        "p99": round(percentile(latencies, 99), 4),
+        "max": round(max(latencies), 4) if latencies else 0.0,
+        "mean": round(statistics.mean(latencies), 4) if latencies else 0.0,
+        "throughput": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "requests": requests,
+        "requests_per_lookup": round(requests / len(latencies), 2) if latencies else 0.0,
+    }
+
+
+def run_pass(names, fetch, server, workers):
+    """コーパス全体に対して fetch を1回ずつ実行し、集計を返す"""
+    def timed(name):
+        started = time.perf_counter()
+        result = fetch(name)
+        return time.perf_counter() - started, result
+
+    requests_before = server.total_requests()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(timed, names))
+    elapsed = time.perf_counter() - started
+    latencies = [latency for latency, _ in results]
+    hits = sum(1 for _, result in results if result)
+    return summarize(latencies, elapsed, server.total_requests() - requests_before, hits)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="URL・ロゴ取得のオフラインベンチマーク")
+    parser.add_argument("--corpus", default=os.path.join(FIXTURES_DIR, "corpus.txt"))
+    parser.add_argument("--scenario", default=None, help="シナリオJSON（省略時は fixtures/scenario.json）")
+    parser.add_argument("--workers", type=int, default=1, help="同時に処理する会社数")
+    parser.add_argument("--repeat", type=int, default=1, help="キャッシュを残したまま繰り返す回数")
+    parser.add_argument("--deadline", type=float, default=None, help="fetch_company_url の制限時間（秒）")
+    parser.add_argument("--json", dest="json_path", default=None, help="結果をJSONで書き出すパス")
+    parser.add_argument("--max-p95", type=float, default=None, help="URL取得の初回p95がこの秒数を超えたら失敗")
+    args = parser.parse_args(argv)
+
+    names = load_corpus(args.corpus)
+    scenario = load_scenario(args.scenario)
+
+    json_path = os.path.abspath(args.json_path) if args.json_path else None
+    # キャッシュなどの data/ 以下は一時ディレクトリに作る
+    workdir = tempfile.mkdtemp(prefix="bench_enrichment_")
+    os.chdir(workdir)
+
+    from utils.http_client import MAX_WORKERS, get_session
+    from utils.dns_resolver import set_resolver
+    from utils.url_fetcher import fetch_company_url, DEFAULT_DEADLINE
+    from utils.logo_fetcher import fetch_company_logo
+
+    server = StubServer(scenario).start()
+    adapter = RoutingAdapter(server.base_url, pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS, max_retries=0)
+    session = get_session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    set_resolver(ScenarioResolver(scenario))
+
+    deadline = args.deadline if args.deadline is not None else DEFAULT_DEADLINE
+    report = {"corpus": len(names), "workers": args.workers, "deadline": deadline, "passes": []}
+    for i in range(args.repeat):
+        report["passes"].append({
+            "pass": i + 1,
+            "url": run_pass(names, lambda n: fetch_company_url(n, deadline=deadline), server, args.workers),
+            "logo": run_pass(names, fetch_company_logo, server, args.workers),
+        })
+    server.shutdown()
+
+    for result in report["passes"]:
+        for kind in ("url", "logo"):
+            r = result[kind]
+            print(f"pass {result['pass']} {kind:4s}  lookups={r['lookups']} hits={r['hits']}"
+                  f"  p50={r['p50']:.3f}s p95={r['p95']:.3f}s p99={r['p99']:.3f}s max={r['max']:.3f}s"
+                  f"  {r['throughput']:.2f} lookups/s  requests={r['requests']} ({r['requests_per_lookup']}/lookup)")
+
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.max_p95 is not None and report["passes"][0]["url"]["p95"] > args.max_p95:
+        print(f"p95 {report['passes'][0]['url']['p95']:.3f}s が上限 {args.max_p95:.3f}s を超えました")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
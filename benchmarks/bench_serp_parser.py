@@ -0,0 +1,115 @@
+"""
+検索結果ページ（SERP）解析のベンチマーク
+
+fixtures/serp/ に保存した検索結果ページに対して、utils/serp_parser の各パーサーと
+従来の方式（ページ全体の BeautifulSoup 木 + CSSセレクタ）で候補URLを取り出し、
+1ページあたりの処理時間を比較する。取り出した候補が expected.json と一致するかも確認する。
+
+使い方:
+    python benchmarks/bench_serp_parser.py
+    python benchmarks/bench_serp_parser.py --repeat 50 --json serp.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from urllib.parse import unquote
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from bs4 import BeautifulSoup
+
+from utils import serp_parser
+from utils.url_fetcher import score_url_quality
+
+SERP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "serp")
+
+
+def baseline_google(text, company_name):
+    """従来の Google 結果ページの解析（比較用）"""
+    soup = BeautifulSoup(text, 'html.parser')
+    found_urls = set()
+    for selector in ['a[href*="/url?q="]', 'a[href^="http"]', '.yuRUbf a', '.kCrYT a']:
+        for link in soup.select(selector):
+            href = link.get('href', '')
+            if '/url?q=' in href:
+                found_urls.add(unquote(href.split('/url?q=')[1].split('&')[0]))
+            elif href.startswith('http'):
+                found_urls.add(href)
+    return sorted(found_urls, key=lambda x: score_url_quality(x, company_name), reverse=True)
+
+
+def baseline_yahoo(text, company_name):
+    """従来の Yahoo! 結果ページの解析（比較用）"""
+    soup = BeautifulSoup(text, 'html.parser')
+    hrefs = [link.get('href', '') for link in soup.find_all('a', href=True)]
+    return list(dict.fromkeys(href for href in hrefs if href.startswith('http')))
+
+
+def parse_with(parser_name, engine, text, company_name):
+    if parser_name == "baseline":
+        return (baseline_google if engine == "google" else baseline_yahoo)(text, company_name)
+    serp_parser.set_parser(parser_name)
+    if engine == "google":
+        return serp_parser.google_candidates(text, lambda url: score_url_quality(url, company_name))
+    return serp_parser.yahoo_candidates(text)
+
+
+def matches(engine, candidates, expected):
+    # 従来の方式は同点の並びが不定なので、Googleは集合として比較する
+    if engine == "google":
+        return set(candidates) == set(expected) and len(candidates) == len(expected)
+    return candidates == expected
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="検索結果ページ解析のベンチマーク")
+    parser.add_argument("--repeat", type=int, default=20, help="1ページあたりの解析回数")
+    parser.add_argument("--json", dest="json_path", default=None, help="結果をJSONで書き出すパス")
+    args = parser.parse_args(argv)
+
+    with open(os.path.join(SERP_DIR, "expected.json"), 'r', encoding='utf-8') as f:
+        expected = json.load(f)
+    pages = {}
+    for name in expected:
+        with open(os.path.join(SERP_DIR, name), 'r', encoding='utf-8') as f:
+            pages[name] = f.read()
+
+    report = {"repeat": args.repeat, "results": []}
+    failed = False
+    for parser_name in ["baseline"] + list(serp_parser.PARSERS):
+        for name, spec in expected.items():
+            engine, company_name = spec["engine"], spec["company_name"]
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                candidates = parse_with(parser_name, engine, pages[name], company_name)
+                timings.append(time.perf_counter() - started)
+            ok = matches(engine, candidates, spec["candidates"])
+            failed = failed or not ok
+            result = {
+                "parser": parser_name,
+                "page": name,
+                "bytes": len(pages[name].encode('utf-8')),
+                "median_ms": round(statistics.median(timings) * 1000, 3),
+                "min_ms": round(min(timings) * 1000, 3),
+                "candidates": len(candidates),
+                "ok": ok,
+            }
+            report["results"].append(result)
+            print(f"{parser_name:10s} {name:22s} median={result['median_ms']:8.3f}ms"
+                  f"  min={result['min_ms']:8.3f}ms  candidates={result['candidates']:3d}"
+                  f"  {'OK' if ok else 'MISMATCH'}")
+    serp_parser.set_parser(serp_parser.DEFAULT_PARSER)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+ベンチマーク用のローカルHTTPスタブサーバー
+
+シナリオ（fixtures/scenario.json）に従って、ホストごとに遅延・タイムアウト・リダイレクト・
+エラーを再現し、Google・Yahoo!の検索結果ページは保存済みのテンプレートから返す。
+RoutingAdapter をSessionにマウントすると、すべてのリクエストがこのサーバーに向かう。
+"""
+import html
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+
+from requests.adapters import HTTPAdapter
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+# "hang" 指定のホストが応答を返すまでの時間（クライアントのタイムアウトより長くする）
+HANG_SECONDS = 30
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def load_scenario(path=None):
+    """シナリオを読み込む（省略時は既定のシナリオ）"""
+    with open(path or os.path.join(FIXTURES_DIR, "scenario.json"), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def render_serp(engine, query, urls):
+    """保存済みテンプレートから検索結果ページを組み立てる"""
+    page = _fixture(f"{engine}_serp.html")
+    result = _fixture(f"{engine}_result.html")
+    results = "\n".join(
+        result.replace("{url}", html.escape(quote(url, safe=':/?=&%') if engine == "google" else url))
+              .replace("{title}", html.escape(url))
+        for url in urls
+    )
+    return page.replace("{results}", results).replace("{query}", html.escape(query))
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "StubServer/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _host(self):
+        return self.headers.get("X-Original-Host", "").split(":")[0].lower()
+
+    def _respond(self, head_only):
+        scenario = self.server.scenario
+        host = self._host()
+        parsed = urlsplit(self.path)
+        self.server.count(host)
+
+        config = scenario["hosts"].get(host)
+        if config is None:
+            self._send(404, head_only)
+            return
+        if config.get("hang"):
+            time.sleep(HANG_SECONDS)
+            return
+        time.sleep(config.get("latency", 0))
+
+        status = config.get("status", 200)
+        if "location" in config:
+            self.send_response(status)
+            self.send_header("Location", config["location"])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = b""
+        content_type = "text/html; charset=utf-8"
+        if host == "www.google.com" and parsed.path == "/search":
+            query = parse_qs(parsed.query).get("q", [""])[0]
+            body = render_serp("google", query, self._serp_urls("serp", query)).encode('utf-8')
+        elif host == "search.yahoo.co.jp" and parsed.path == "/search":
+            query = parse_qs(parsed.query).get("p", [""])[0]
+            body = render_serp("yahoo", query, self._serp_urls("yahoo", query)).encode('utf-8')
+        elif host == "logo.clearbit.com":
+            # 存在するドメインのロゴだけを返す
+            domain = parsed.path.strip("/")
+            if scenario["hosts"].get(domain, {}).get("status") != 200:
+                status = 404
+            content_type = "image/png"
+
+        self._send(status, head_only, body, content_type)
+
+    def _serp_urls(self, key, query):
+        for name, urls in self.server.scenario.get(key, {}).items():
+            if name in query:
+                return urls
+        return []
+
+    def _send(self, status, head_only, body=b"", content_type="text/html; charset=utf-8"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head_only and body:
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self._respond(head_only=True)
+
+    def do_GET(self):
+        self._respond(head_only=False)
+
+
+class StubServer(ThreadingHTTPServer):
+    """シナリオを保持し、ホストごとのリクエスト数を数えるサーバー"""
+
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, scenario, port=0):
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.scenario = scenario
+        self._lock = threading.Lock()
+        self.requests = {}
+
+    def count(self, host):
+        with self._lock:
+            self.requests[host] = self.requests.get(host, 0) + 1
+
+    def total_requests(self):
+        with self._lock:
+            return sum(self.requests.values())
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class RoutingAdapter(HTTPAdapter):
+    """
+    すべてのリクエストをスタブサーバーに転送するアダプター
+    （元のホスト名は X-Original-Host ヘッダーで渡し、レスポンスのURLは元のURLに戻す）
+    """
+
+    def __init__(self, base_url, **kwargs):
+        self.base_url = base_url
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        original_url = request.url
+        parsed = urlsplit(original_url)
+        request.headers["X-Original-Host"] = parsed.hostname or ""
+        path = parsed.path or "/"
+        request.url = f"{self.base_url}{path}" + (f"?{parsed.query}" if parsed.query else "")
+        response = super().send(request, **kwargs)
+        response.url = original_url
+        request.url = original_url
+        return response
+
+
+class ScenarioResolver:
+    """シナリオに登場するホストだけを解決する偽リゾルバ"""
+
+    def __init__(self, scenario):
+        self.hosts = set(scenario["hosts"])
+
+    def resolve(self, host):
+        if host.lower() in self.hosts:
+            return ["127.0.0.1"], 300
+        return [], 60
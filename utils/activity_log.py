@@ -0,0 +1,189 @@
+import glob
+import gzip
+import io
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils.exporter import open_stream
+
+LOG_DIR = "data"
+LOG_FILE = os.path.join(LOG_DIR, "activity_logs.jsonl")
+LEGACY_LOG_FILE = os.path.join(LOG_DIR, "activity_logs.json")
+SEGMENT_PATTERN = os.path.join(LOG_DIR, "activity_logs-*.jsonl.gz")
+
+# 現在のログファイルがこのサイズを超えたらローテーションして圧縮する
+MAX_BYTES = 5 * 1024 * 1024
+
+_rotate_lock = threading.Lock()
+
+
+def _segment_path(suffix: str) -> str:
+    return os.path.join(LOG_DIR, f"activity_logs-{suffix}.jsonl.gz")
+
+
+def _compress(source: str, target: str):
+    """ファイルをgzip圧縮して元ファイルを削除する"""
+    tmp = target + ".tmp"
+    with open(source, 'rb') as src, gzip.open(tmp, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.replace(tmp, target)
+    os.remove(source)
+
+
+def _migrate_legacy():
+    """旧形式（JSON配列）のログを圧縮済みセグメントに変換する"""
+    if not os.path.exists(LEGACY_LOG_FILE):
+        return
+    try:
+        with open(LEGACY_LOG_FILE, 'r', encoding='utf-8') as f:
+            logs = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        logs = []
+    tmp = _segment_path("00000000T000000000000-legacy") + ".tmp"
+    with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+        for entry in logs:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    os.replace(tmp, _segment_path("00000000T000000000000-legacy"))
+    os.replace(LEGACY_LOG_FILE, LEGACY_LOG_FILE + ".migrated")
+
+
+def _rotate_if_needed():
+    try:
+        if os.path.getsize(LOG_FILE) < MAX_BYTES:
+            return
+    except FileNotFoundError:
+        return
+    with _rotate_lock:
+        suffix = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        rotated = os.path.join(LOG_DIR, f"activity_logs-{suffix}.jsonl")
+        try:
+            # 他プロセスが先にローテーションした場合はここで失敗する
+            os.rename(LOG_FILE, rotated)
+        except FileNotFoundError:
+            return
+        _compress(rotated, _segment_path(suffix))
+
+
+def append_log(entry: Dict):
+    """
+    ログを1行追記する（O_APPENDによる1回の書き込みなので同時書き込みでも行が混ざらない）
+    """
+    os.makedirs(LOG_DIR, exist_ok=True)
+    _migrate_legacy()
+    _rotate_if_needed()
+    line = (json.dumps(entry, ensure_ascii=False) + "\n").encode('utf-8')
+    fd = os.open(LOG_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def _segments():
+    """古い順にログファイルのパスを返す"""
+    segments = sorted(glob.glob(SEGMENT_PATTERN))
+    if os.path.exists(LOG_FILE):
+        segments.append(LOG_FILE)
+    return segments
+
+
+def iter_log_lines() -> Iterator[bytes]:
+    """ログを古い順に1行ずつ（JSON Lines形式のbytesで）返す"""
+    if os.path.exists(LEGACY_LOG_FILE):
+        _migrate_legacy()
+    for path in _segments():
+        opener = gzip.open if path.endswith(".gz") else open
+        try:
+            with opener(path, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        yield line if line.endswith(b"\n") else line + b"\n"
+        except FileNotFoundError:
+            # 読み込み中にローテーションされたファイルは圧縮後のセグメントで読まれる
+            continue
+
+
+def iter_logs(action: Optional[str] = None) -> Iterator[Dict]:
+    """ログを古い順に1件ずつ返す（壊れた行は読み飛ばす）"""
+    for line in iter_log_lines():
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if action is None or entry.get("action") == action:
+            yield entry
+
+
+def _unread_segments(done) -> List[str]:
+    return [path for path in sorted(glob.glob(SEGMENT_PATTERN)) if os.path.basename(path) not in done]
+
+
+def read_new_lines(cursor: Optional[Dict] = None) -> Tuple[List[bytes], Dict]:
+    """
+    前回の続きから新しく追記されたログの行だけを返す（cursor は前回の戻り値、初回はNone）
+    cursor は「読み終えたセグメント名」と「現在のファイルを何バイト目まで読んだか」を持つ
+    """
+    cursor = cursor or {}
+    done = set(cursor.get("done", []))
+    offset = cursor.get("offset", 0)
+    inode = cursor.get("inode")
+    if os.path.exists(LEGACY_LOG_FILE):
+        _migrate_legacy()
+
+    lines = []
+    segments = _unread_segments(done)
+    for i, path in enumerate(segments):
+        with gzip.open(path, 'rb') as f:
+            # セグメントは現在のファイルのローテーションでしか増えないので、
+            # 途中まで読んでいたファイルは未読のうち最も古いセグメントになっている
+            if i == 0 and offset:
+                f.seek(offset)
+            lines.extend(line for line in f.read().splitlines() if line.strip())
+        done.add(os.path.basename(path))
+    if segments:
+        offset, inode = 0, None
+
+    try:
+        f = open(LOG_FILE, 'rb')
+    except FileNotFoundError:
+        return lines, {"done": sorted(done), "offset": offset, "inode": inode}
+    with f:
+        stat = os.fstat(f.fileno())
+        if offset and (stat.st_ino != inode or stat.st_size < offset):
+            # ローテーション中（圧縮前）なので、セグメントができてから続きを読む
+            return lines, {"done": sorted(done), "offset": offset, "inode": inode}
+        f.seek(offset)
+        data = f.read()
+    if _unread_segments(done):
+        # 読んでいる間にローテーションされた場合は、今回読んだ分を捨てて次回セグメントから読む
+        return lines, {"done": sorted(done), "offset": offset, "inode": inode}
+    # 書き込み途中の最後の行は次回に読む
+    end = data.rfind(b"\n") + 1
+    lines.extend(line for line in data[:end].splitlines() if line.strip())
+    return lines, {"done": sorted(done), "offset": offset + end, "inode": stat.st_ino}
+
+
+def log_signature() -> Optional[Tuple[int, int, int]]:
+    """
+    現在のログファイルの (inode, サイズ, 更新日時) を返す（ファイルがなければNone）
+    前回と同じなら追記もローテーションもされていないので、読み直さずに済む
+    """
+    try:
+        stat = os.stat(LOG_FILE)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def has_logs() -> bool:
+    """ログが1件でもあるか"""
+    return next(iter_log_lines(), None) is not None
+
+
+def open_log_stream() -> io.BufferedReader:
+    """ダウンロード用にログをストリームとして開く"""
+    return open_stream(iter_log_lines())
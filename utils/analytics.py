@@ -0,0 +1,289 @@
+import io
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.activity_log import log_signature, read_new_lines
+from utils.views import ACTIVE_STATUSES
+
+ROLLUP_FILE = "data/analytics_rollup.json"
+
+# ファネルの段階（この順に進む）
+FUNNEL_STAGES = ["初期接触", "商談中", "成約"]
+# 経過日数の区切り
+AGING_BINS = [-np.inf, 7, 30, 90, 180, np.inf]
+AGING_LABELS = ["〜7日", "8〜30日", "31〜90日", "91〜180日", "181日〜"]
+
+# ステータスが決まる（その段階に入った）ログの種類
+STAGE_ACTIONS = ["add_startup", "update_startup"]
+# 削除されたレコードの段階の終わりを表す内部的な段階
+DELETED = "__deleted__"
+DAILY_COLUMNS = ["adds", "wins", "losses", "deletes"]
+
+
+def _empty_daily() -> pd.DataFrame:
+    return pd.DataFrame({column: pd.Series(dtype="int64") for column in DAILY_COLUMNS},
+                        index=pd.DatetimeIndex([], name="date"))
+
+
+def _empty_stages() -> pd.DataFrame:
+    return pd.DataFrame({
+        "id": pd.Series(dtype=object),
+        "stage": pd.Series(dtype=object),
+        "entered": pd.Series(dtype="datetime64[ns]"),
+    })
+
+
+def _parse_events(lines: List[bytes]) -> pd.DataFrame:
+    """ログの行を (action, timestamp, id, status) の列にする"""
+    try:
+        frame = pd.read_json(io.BytesIO(b"\n".join(lines)), lines=True, dtype=False, convert_dates=False)
+    except ValueError:
+        # 壊れた行がある場合は1行ずつ読み、読めない行は捨てる
+        entries = []
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict):
+                entries.append(entry)
+        frame = pd.DataFrame(entries)
+    if frame.empty or "action" not in frame or "timestamp" not in frame:
+        return pd.DataFrame(columns=["action", "timestamp", "id", "status"])
+    data = frame["data"] if "data" in frame else pd.Series([None] * len(frame), index=frame.index)
+    data = data.where(data.map(lambda value: isinstance(value, dict)), None)
+    events = pd.DataFrame({
+        "action": frame["action"],
+        "timestamp": pd.to_datetime(frame["timestamp"], errors="coerce", format="ISO8601"),
+        "id": data.str.get("id"),
+        "status": data.str.get("status"),
+    })
+    if events["timestamp"].dt.tz is not None:
+        events["timestamp"] = events["timestamp"].dt.tz_convert(None)
+    return events.dropna(subset=["timestamp"])
+
+
+class PipelineRollup:
+    """
+    アクティビティログから作る日次集計と、各レコードが各段階に入った日時の列
+    前回読んだ位置を覚えておき、新しく追記されたログだけを読んで追加する
+    集計はpandasのバージョンに依存しないよう、JSONの素の値で保存する
+    """
+
+    def __init__(self, path: str = ROLLUP_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.cursor: Dict = {}
+        self.daily = _empty_daily()
+        self.stages = _empty_stages()
+        # 集計が変わるたびに増える（表示用の計算結果のキャッシュキー）
+        self.revision = 0
+        # 最後まで読み終えたときのログファイルの状態（変わっていなければログを開かない）
+        self._signature = None
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            daily = state["daily"]
+            self.daily = pd.DataFrame(
+                daily["rows"], columns=DAILY_COLUMNS, dtype="int64",
+                index=pd.DatetimeIndex(pd.to_datetime(daily["dates"]), name="date"),
+            ) if daily["dates"] else _empty_daily()
+            stages = pd.DataFrame(state["stages"], columns=["id", "stage", "entered"], dtype=object)
+            self.stages = stages.assign(entered=pd.to_datetime(stages["entered"]).astype("datetime64[ns]"))
+            self.cursor = dict(state["cursor"])
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # 読めない・形式が違う場合はログの最初から集計し直す
+            self.cursor, self.daily, self.stages = {}, _empty_daily(), _empty_stages()
+        self._loaded = True
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {
+            "cursor": self.cursor,
+            "daily": {
+                "dates": [date.strftime("%Y-%m-%d") for date in self.daily.index],
+                "rows": self.daily[DAILY_COLUMNS].to_numpy().tolist(),
+            },
+            "stages": [
+                [startup_id, stage, entered.isoformat()]
+                for startup_id, stage, entered in zip(self.stages["id"], self.stages["stage"], self.stages["entered"])
+            ],
+        }
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def refresh(self) -> int:
+        """新しく追記されたログを集計に追加する（追加したイベント数を返す）"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self.revision += 1
+            signature = log_signature()
+            if signature is not None and signature == self._signature:
+                return 0
+            lines, cursor = read_new_lines(self.cursor)
+            # 現在のファイルを最後まで読めた場合だけ状態を覚える（ローテーション中や書き込み途中の行があれば次回も読む）
+            complete = signature is not None and (cursor.get("inode"), cursor.get("offset")) == signature[:2]
+            self._signature = signature if complete else None
+            if not lines:
+                self.cursor = cursor
+                return 0
+            events = _parse_events(lines)
+            if not events.empty:
+                self._extend(events)
+            self.cursor = cursor
+            self._save()
+            self.revision += 1
+            return len(events)
+
+    def _extend(self, events: pd.DataFrame):
+        action, status = events["action"], events["status"]
+        entered_stage = action.isin(STAGE_ACTIONS)
+        counts = pd.DataFrame({
+            "adds": action == "add_startup",
+            "wins": entered_stage & (status == "成約"),
+            "losses": entered_stage & (status == "見送り"),
+            "deletes": action == "delete_startup",
+        }).groupby(events["timestamp"].dt.normalize().rename("date")).sum()
+        self.daily = self.daily.add(counts, fill_value=0).astype("int64")
+
+        has_id = events["id"].notna()
+        stage_rows = events[entered_stage & has_id & status.notna()]
+        deleted_rows = events[(action == "delete_startup") & has_id]
+        new_stages = pd.concat([
+            pd.DataFrame({"id": stage_rows["id"], "stage": stage_rows["status"], "entered": stage_rows["timestamp"]}),
+            pd.DataFrame({"id": deleted_rows["id"], "stage": DELETED, "entered": deleted_rows["timestamp"]}),
+        ], ignore_index=True)
+        if not new_stages.empty:
+            self.stages = pd.concat([self.stages, new_stages], ignore_index=True)
+
+
+def records_frame(startups: List) -> pd.DataFrame:
+    """一覧を (id, status, created) の列にする"""
+    # ログ側と同じ object 型にそろえる（型が違うと isin が遅くなる）
+    return pd.DataFrame({
+        "id": pd.Series([startup["id"] for startup in startups], dtype=object),
+        "status": pd.Series([startup["status"] for startup in startups], dtype=object),
+        "created": pd.to_datetime([startup.created for startup in startups]),
+    })
+
+
+def _stage_history(stages: pd.DataFrame, records: pd.DataFrame, now: pd.Timestamp) -> pd.DataFrame:
+    """
+    各レコードが各段階にいた期間（entered〜left）の表を作る
+    ログにないレコード（復元・移行したものなど）は作成日時から今のステータスにいたものとする
+    """
+    missing = records[~records["id"].isin(stages["id"]) & records["created"].notna()]
+    history = pd.concat([
+        stages,
+        pd.DataFrame({"id": missing["id"], "stage": missing["status"], "entered": missing["created"]}),
+    ], ignore_index=True).sort_values(["id", "entered"], kind="stable")
+    # 同じ段階が続く行（ステータス以外の更新）はまとめる
+    same = (history["id"] == history["id"].shift()) & (history["stage"] == history["stage"].shift())
+    history = history[~same]
+    left = history.groupby("id")["entered"].shift(-1)
+    # まだ存在するレコードの最後の段階は現在まで続いている
+    alive = history["id"].isin(records["id"])
+    history = history.assign(left=left.mask(left.isna() & alive, now))
+    return history[history["stage"] != DELETED]
+
+
+def time_in_stage(history: pd.DataFrame) -> pd.DataFrame:
+    """段階ごとの滞在日数（件数・平均・中央値・90パーセンタイル、完了ステータスは終わりがないので除く）"""
+    history = history[history["stage"].isin(ACTIVE_STATUSES)]
+    days = (history["left"] - history["entered"]).dt.total_seconds() / 86400
+    stats = days.groupby(history["stage"]).agg(["count", "mean", "median", lambda d: d.quantile(0.9)])
+    stats.columns = ["件数", "平均日数", "中央値", "90%点"]
+    return stats.reindex(ACTIVE_STATUSES).fillna(0).round(1)
+
+
+def funnel(history: pd.DataFrame, records: pd.DataFrame) -> pd.DataFrame:
+    """初期接触→商談中→成約 のファネル（各段階に到達した現存レコード数と転換率）"""
+    rank = history["stage"].map({stage: i for i, stage in enumerate(FUNNEL_STAGES)})
+    reached = rank.groupby(history["id"]).max()
+    # 保留・見送りしか通っていないレコードも最初の段階には入ったものとする
+    reached = reached.reindex(records["id"]).fillna(0)
+    counts = pd.Series(
+        (reached.to_numpy()[:, None] >= np.arange(len(FUNNEL_STAGES))).sum(axis=0),
+        index=FUNNEL_STAGES,
+    )
+    first = counts.iloc[0] or 1
+    return pd.DataFrame({
+        "到達数": counts,
+        "初期接触からの割合(%)": (counts / first * 100).round(1),
+        "前段階からの割合(%)": (counts / counts.shift().fillna(counts.iloc[0]).replace(0, np.nan) * 100).round(1).fillna(0),
+    })
+
+
+def weekly_volumes(daily: pd.DataFrame) -> pd.DataFrame:
+    """週ごとの追加数・成約数・見送り数"""
+    if daily.empty:
+        return pd.DataFrame(columns=["追加", "成約", "見送り"])
+    weekly = daily[["adds", "wins", "losses"]].resample("W-MON", label="left", closed="left").sum()
+    weekly.index = weekly.index.strftime("%Y-%m-%d")
+    return weekly.rename(columns={"adds": "追加", "wins": "成約", "losses": "見送り"})
+
+
+def aging(records: pd.DataFrame, now: pd.Timestamp) -> pd.DataFrame:
+    """アクティブ案件の経過日数の分布（ステータス別）"""
+    active = records[records["status"].isin(ACTIVE_STATUSES)]
+    age = (now - active["created"]).dt.days.fillna(0)
+    buckets = pd.cut(age, AGING_BINS, labels=AGING_LABELS).rename("経過日数")
+    table = pd.crosstab(buckets, active["status"]).reindex(index=AGING_LABELS, fill_value=0)
+    return table.reindex(columns=ACTIVE_STATUSES, fill_value=0)
+
+
+class PipelineAnalytics:
+    """集計の更新と、表示用の計算結果のキャッシュ（データとログが変わるまで使い回す）"""
+
+    def __init__(self, rollup: Optional[PipelineRollup] = None):
+        self.rollup = rollup or PipelineRollup()
+        self._lock = threading.Lock()
+        self._key = None
+        self._result = None
+
+    def compute(self, startups: List, version) -> Dict[str, pd.DataFrame]:
+        self.rollup.refresh()
+        key = (version, self.rollup.revision, datetime.now().date())
+        with self._lock:
+            if self._key != key:
+                now = pd.Timestamp.now()
+                records = records_frame(startups)
+                history = _stage_history(self.rollup.stages, records, now)
+                self._result = {
+                    "time_in_stage": time_in_stage(history),
+                    "funnel": funnel(history, records),
+                    "weekly": weekly_volumes(self.rollup.daily),
+                    "aging": aging(records, now),
+                }
+                self._key = key
+            return self._result
+
+
+_analytics = None
+_analytics_lock = threading.Lock()
+
+
+def get_analytics() -> PipelineAnalytics:
+    """全セッションで共有する分析の集計を返す"""
+    global _analytics
+    if _analytics is None:
+        with _analytics_lock:
+            if _analytics is None:
+                _analytics = PipelineAnalytics()
+    return _analytics
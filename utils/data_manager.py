@@ -1,30 +1,596 @@
 import json
 import os
-from typing import List, Dict
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple
+
+from utils.journal import get_journal, OP_PUT, OP_DELETE, SNAPSHOT_EVERY
+from utils.models import Startup
 
 DATA_FILE = "data/startups.json"
+DB_FILE = "data/startups.db"
+
+# 保存先の切り替え（"sqlite" または "json"）
+STORAGE_BACKEND = os.environ.get("STARTUP_STORAGE", "sqlite")
+# 他プロセスによる変更を確認する（保存ファイルをstatする）最短間隔（秒）
+STAT_INTERVAL = 1.0
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _ensure_ids(startups: Iterable[Dict]) -> bool:
+    """IDを持たない既存レコードにIDを付与する（付与した場合はTrue）"""
+    assigned = False
+    for startup in startups:
+        if not startup.get("id"):
+            startup["id"] = _new_id()
+            assigned = True
+    return assigned
+
+
+def _atomic_write_json(path: str, data):
+    """
+    一時ファイルに書き出してfsyncしてから置き換える
+    （書き込み中にプロセスが落ちても元のファイルが壊れない）
+    """
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    # 置き換え（rename）自体もディスクに反映する
+    try:
+        fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class JsonBackend:
+    """
+    data/startups.json に全件を書き出す従来の保存方式
+    """
+
+    def __init__(self, path: str = DATA_FILE):
+        self.path = path
+        self.stat_paths = [path]
+        # 読み込み→変更→書き出しの間に他のスレッドの書き込みが割り込まないようにする
+        self._lock = threading.RLock()
+
+    def load_all(self) -> List[Dict]:
+        with self._lock:
+            return self._load_all()
+
+    def _load_all(self) -> List[Dict]:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    startups = json.load(f)
+            except:
+                return []
+            # 付与したIDが読み込みごとに変わらないよう書き戻す
+            if _ensure_ids(startups):
+                self.replace_all(startups)
+            return startups
+        return []
+
+    def replace_all(self, startups: List[Dict]):
+        _ensure_ids(startups)
+        with self._lock:
+            _atomic_write_json(self.path, startups)
+
+    def insert(self, startup: Dict):
+        with self._lock:
+            startups = self.load_all()
+            startups.append(startup)
+            self.replace_all(startups)
+
+    def bulk_write(self, batches: Iterable[List[Dict]], replace: bool = False) -> int:
+        with self._lock:
+            return self._bulk_write(batches, replace)
+
+    def _bulk_write(self, batches: Iterable[List[Dict]], replace: bool) -> int:
+        startups = [] if replace else self.load_all()
+        positions = {s["id"]: i for i, s in enumerate(startups)}
+        written = 0
+        for batch in batches:
+            _ensure_ids(batch)
+            for startup in batch:
+                if startup["id"] in positions:
+                    startups[positions[startup["id"]]] = startup
+                else:
+                    positions[startup["id"]] = len(startups)
+                    startups.append(startup)
+            written += len(batch)
+        self.replace_all(startups)
+        return written
+
+    def update(self, startup: Dict):
+        with self._lock:
+            startups = [startup if s.get("id") == startup["id"] else s for s in self.load_all()]
+            self.replace_all(startups)
+
+    def delete(self, startup_id: str):
+        with self._lock:
+            self.replace_all([s for s in self.load_all() if s.get("id") != startup_id])
+
+    def iter_batches(self, statuses: Optional[List[str]] = None, batch_size: int = 500) -> Iterator[List[Dict]]:
+        startups = self.query(statuses)
+        for i in range(0, len(startups), batch_size):
+            yield startups[i:i + batch_size]
+
+    def get(self, startup_id: str) -> Optional[Dict]:
+        for startup in self.load_all():
+            if startup.get("id") == startup_id:
+                return startup
+        return None
+
+    def query(self, statuses: Optional[List[str]] = None) -> List[Dict]:
+        startups = self.load_all()
+        if statuses is not None:
+            startups = [s for s in startups if s["status"] in statuses]
+        return startups
+
+
+class SqliteBackend:
+    """
+    data/startups.db に1件ずつ保存する方式
+    status・company_name・created_at にインデックスを張り、書き出しや再補完でのステータスの絞り込みをクエリで行う
+    （画面の件数・絞り込みは共有の一覧から作る集計 utils.views で行う）
+    """
+
+    def __init__(self, path: str = DB_FILE, json_path: str = DATA_FILE):
+        self.path = path
+        # WALモードでは書き込みがまず -wal ファイルに入る
+        self.stat_paths = [path, path + "-wal"]
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS startups ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " id TEXT NOT NULL UNIQUE,"
+            " company_name TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " created_at TEXT,"
+            " updated_at TEXT,"
+            " data TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_startups_status ON startups(status)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_startups_company_name ON startups(company_name)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_startups_created_at ON startups(created_at)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._migrate_from_json(json_path)
+
+    def _migrate_from_json(self, json_path: str):
+        """既存のJSONファイルを初回のみ取り込む"""
+        with self._lock:
+            migrated = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'migrated_from_json'"
+            ).fetchone()
+        if migrated or not os.path.exists(json_path):
+            return
+        startups = JsonBackend(json_path).load_all()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._insert_many(startups)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from_json', ?)",
+                    (json_path,)
+                )
+                self._conn.execute("COMMIT")
+            except:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _row(startup: Dict):
+        return (
+            startup["id"],
+            startup.get("company_name", ""),
+            startup.get("status", ""),
+            startup.get("created_at"),
+            startup.get("updated_at"),
+            json.dumps(startup, ensure_ascii=False),
+        )
+
+    def _insert_many(self, startups: List[Dict]):
+        _ensure_ids(startups)
+        self._conn.executemany(
+            "INSERT INTO startups (id, company_name, status, created_at, updated_at, data)"
+            " VALUES (?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT(id) DO UPDATE SET company_name = excluded.company_name,"
+            " status = excluded.status, created_at = excluded.created_at,"
+            " updated_at = excluded.updated_at, data = excluded.data",
+            [self._row(s) for s in startups]
+        )
+
+    def load_all(self) -> List[Dict]:
+        return self.query()
+
+    def replace_all(self, startups: List[Dict]):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM startups")
+                self._insert_many(startups)
+                self._conn.execute("COMMIT")
+            except:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def insert(self, startup: Dict):
+        with self._lock:
+            self._insert_many([startup])
+
+    def bulk_write(self, batches: Iterable[List[Dict]], replace: bool = False) -> int:
+        """
+        バッチを1つのトランザクションで書き込む（同じIDは上書き）
+        途中で例外が起きた場合はロールバックし、既存データは変更しない
+        """
+        written = 0
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if replace:
+                    self._conn.execute("DELETE FROM startups")
+                for batch in batches:
+                    self._insert_many(batch)
+                    written += len(batch)
+                self._conn.execute("COMMIT")
+            except:
+                self._conn.execute("ROLLBACK")
+                raise
+        return written
+
+    def update(self, startup: Dict):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE startups SET company_name = ?, status = ?, created_at = ?, updated_at = ?, data = ?"
+                " WHERE id = ?",
+                self._row(startup)[1:] + (startup["id"],)
+            )
+
+    def delete(self, startup_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM startups WHERE id = ?", (startup_id,))
+
+    def get(self, startup_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM startups WHERE id = ?", (startup_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query(self, statuses: Optional[List[str]] = None) -> List[Dict]:
+        sql = "SELECT data FROM startups"
+        params = []
+        if statuses is not None:
+            sql += f" WHERE status IN ({','.join('?' for _ in statuses)})"
+            params = list(statuses)
+        sql += " ORDER BY seq"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def iter_batches(self, statuses: Optional[List[str]] = None, batch_size: int = 500) -> Iterator[List[Dict]]:
+        """登録順にbatch_size件ずつ読み出す（全件をメモリに載せない）"""
+        sql = "SELECT seq, data FROM startups WHERE seq > ?"
+        params = []
+        if statuses is not None:
+            sql += f" AND status IN ({','.join('?' for _ in statuses)})"
+            params = list(statuses)
+        sql += " ORDER BY seq LIMIT ?"
+        last_seq = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(sql, [last_seq] + params + [batch_size]).fetchall()
+            if not rows:
+                return
+            last_seq = rows[-1][0]
+            yield [json.loads(row[1]) for row in rows]
+
 
-def load_data() -> List[Dict]:
-    """スタートアップデータを読み込む"""
-    if not os.path.exists("data"):
-        os.makedirs("data")
-    
-    if os.path.exists(DATA_FILE):
+_backend = None
+_backend_lock = threading.Lock()
+_patch_lock = threading.Lock()
+_journal_lock = threading.Lock()
+# このプロセス内での書き込み回数
+_write_count = 0
+
+
+# 最後に確認した保存ファイルの状態と確認した時刻
+_file_stats = None
+_file_stats_checked = 0.0
+
+
+def _stat_files():
+    global _file_stats, _file_stats_checked
+    stats = []
+    for path in get_backend().stat_paths:
         try:
-            with open(DATA_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
+            st = os.stat(path)
+            stats.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            stats.append(None)
+    _file_stats = tuple(stats)
+    _file_stats_checked = time.monotonic()
+
+
+def _bump_version():
+    global _write_count
+    _write_count += 1
+    # 自分の書き込みによるファイルの変化を他プロセスの変更と取り違えないよう、すぐに確認し直す
+    _stat_files()
+
+
+def data_version():
+    """
+    データのバージョンを返す（このプロセスの書き込み回数と保存ファイルのmtime・サイズ）
+    他プロセスによる書き込みもファイルの変化として検出できる
+    （ファイルの確認はSTAT_INTERVAL秒に1回なので、変更がなければ再実行ごとのファイルI/Oはない）
+    """
+    if _file_stats is None or time.monotonic() - _file_stats_checked >= STAT_INTERVAL:
+        _stat_files()
+    return (_write_count, _file_stats)
+
+
+def get_backend():
+    """設定に応じた保存先を返す"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if not os.path.exists("data"):
+                    os.makedirs("data")
+                if STORAGE_BACKEND == "json":
+                    backend = JsonBackend()
+                else:
+                    backend = SqliteBackend()
+                # 差分ログの起点となるスナップショットがなければ現在の状態で作る
+                if not get_journal().has_snapshot():
+                    get_journal().write_snapshot(backend.load_all)
+                _backend = backend
+    return _backend
+
+
+def _record(op: str, startups: Optional[List[Dict]] = None, ids: Optional[List[str]] = None):
+    """
+    書き込みを差分ログに追記し、差分が溜まっていれば新しいスナップショットを書く
+    （スナップショットは保存先から全件を読み直して作る）
+    """
+    journal = get_journal()
+    with _journal_lock:
+        journal.record(op, startups, ids)
+        if journal.snapshot_due():
+            journal.write_snapshot(get_backend().load_all)
+
+
+def load_data() -> List[Startup]:
+    """スタートアップデータを読み込む（作成日時は読み込み時に解析しておく）"""
+    return [Startup.from_dict(startup) for startup in get_backend().load_all()]
 
 def save_data(startups: List[Dict]):
-    """スタートアップデータを保存する"""
-    if not os.path.exists("data"):
-        os.makedirs("data")
-    
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(startups, f, ensure_ascii=False, indent=2)
-
-def add_startup(startups: List[Dict], startup_data: Dict):
-    """新しいスタートアップを追加する"""
-    startups.append(startup_data)
+    """スタートアップデータを保存する（全件置き換え）"""
+    records = [_to_dict(startup) for startup in startups]
+    get_backend().replace_all(records)
+    _bump_version()
+    # 全件の置き換えはそのままスナップショットにする
+    with _journal_lock:
+        get_journal().write_snapshot(get_backend().load_all)
+
+def add_startup(startups: List[Startup], startup_data: Dict) -> Startup:
+    """新しいスタートアップを追加して保存する（一覧に追加したレコードを返す）"""
+    if not startup_data.get("id"):
+        startup_data["id"] = _new_id()
+    record = _to_dict(startup_data)
+    get_backend().insert(record)
+    _bump_version()
+    _record(OP_PUT, [record])
+    startup = Startup.from_dict(startup_data)
+    startups.append(startup)
+    return startup
+
+def update_startup(startups: List[Startup], startup_data: Dict):
+    """既存のスタートアップを更新して保存する"""
+    record = _to_dict(startup_data)
+    get_backend().update(record)
+    _bump_version()
+    _record(OP_PUT, [record])
+    for i, startup in enumerate(startups):
+        if startup.get("id") == startup_data["id"]:
+            startups[i] = Startup.from_dict(startup_data)
+            break
+
+def delete_startup(startups: List[Startup], startup_data: Dict):
+    """スタートアップを削除する"""
+    get_backend().delete(startup_data["id"])
+    _bump_version()
+    _record(OP_DELETE, ids=[startup_data["id"]])
+    startups[:] = [s for s in startups if s.get("id") != startup_data["id"]]
+
+def _to_dict(startup) -> Dict:
+    return startup.to_dict() if isinstance(startup, Startup) else startup
+
+def bulk_write(batches: Iterable[List[Dict]], replace: bool = False) -> int:
+    """
+    バッチ単位でまとめて書き込む（replace=Trueの場合は既存データを置き換える）
+    失敗した場合は既存データを変更しない
+    """
+    # 書き込んだレコードを差分ログ用に控える（多い場合はスナップショットにする）
+    written = []
+    overflow = [replace]
+
+    def recorded():
+        for batch in batches:
+            if not overflow[0]:
+                written.extend(batch)
+                if len(written) > SNAPSHOT_EVERY:
+                    overflow[0] = True
+                    written.clear()
+            yield batch
+
+    try:
+        count = get_backend().bulk_write(recorded(), replace)
+    finally:
+        _bump_version()
+    if overflow[0]:
+        with _journal_lock:
+            get_journal().write_snapshot(get_backend().load_all)
+    elif written:
+        _record(OP_PUT, written)
+    return count
+
+def patch_startup(startup_id: str, fields: Dict) -> Optional[Dict]:
+    """
+    保存済みのスタートアップの一部の項目だけを更新する
+    （レコードが削除済みの場合は何もせずNoneを返す）
+    """
+    with _patch_lock:
+        startup = get_backend().get(startup_id)
+        if startup is None:
+            return None
+        startup.update(fields)
+        get_backend().update(startup)
+        _bump_version()
+        _record(OP_PUT, [startup])
+    return startup
+
+def patch_startups(patches: Dict[str, Dict]) -> int:
+    """
+    複数のスタートアップの一部の項目をまとめて更新する（1回のトランザクション・1回のバージョン更新）
+    削除済みのレコードは無視し、更新した件数を返す
+    """
+    return len(_patch_records(patches))
+
+def _patch_records(patches: Dict[str, Dict]) -> List[Dict]:
+    """patch_startups の本体（更新後のレコードを返す）"""
+    with _patch_lock:
+        startups = []
+        for startup_id, fields in patches.items():
+            startup = get_backend().get(startup_id)
+            if startup is not None:
+                startup.update(fields)
+                startups.append(startup)
+        if not startups:
+            return []
+        get_backend().bulk_write([startups])
+        _bump_version()
+        _record(OP_PUT, startups)
+    return startups
+
+def restore_points() -> Dict:
+    """時点を指定して復元できる範囲（最も古いスナップショットの日時とスナップショット数）"""
+    return get_journal().restore_points()
+
+def state_at(when: datetime) -> List[Dict]:
+    """
+    when 時点の全件を返す（直前のスナップショットにその後の差分だけを適用する）
+    スナップショットの保持期間より前の場合は JournalError
+    """
+    return get_journal().state_at(when)
+
+def iter_startups(statuses: Optional[List[str]] = None, batch_size: int = 500) -> Iterator[List[Dict]]:
+    """指定したステータスのスタートアップを登録順にbatch_size件ずつ返す"""
+    return get_backend().iter_batches(statuses, batch_size)
+
+
+class SharedDataset:
+    """
+    プロセス内の全セッションで共有する一覧
+    バージョンが変わったときだけ読み込み直し、変わっていなければファイルを読まずに同じ一覧を返す
+    一覧は書き換えずに新しいリストに差し替えるので、読み手は受け取った一覧をそのまま使える
+    追加・削除・一部の更新はレコード単位で書き込むので、他のセッションの変更を上書きしない
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.startups: List[Startup] = []
+        self.version = None
+
+    def snapshot(self) -> Tuple[List[Startup], tuple]:
+        """(一覧, バージョン) を返す"""
+        version = data_version()
+        if version == self.version:
+            return self.startups, version
+        with self._lock:
+            version = data_version()
+            if version != self.version:
+                # 読み込み中に書き込まれた場合は古いバージョンのままになり、次回読み込み直す
+                startups = load_data()
+                self.startups, self.version = startups, version
+            return self.startups, self.version
+
+    def _apply(self, previous_version, startups: List[Startup]):
+        # 手元の一覧が最新だった場合だけ差分で反映する（それ以外は次回読み込み直す）
+        if self.version == previous_version:
+            self.startups, self.version = startups, data_version()
+
+    def add(self, startup_data: Dict) -> Startup:
+        """追加して保存し、追加したレコードを返す"""
+        with self._lock:
+            previous_version = data_version()
+            startups = list(self.startups)
+            startup = add_startup(startups, startup_data)
+            self._apply(previous_version, startups)
+            return startup
+
+    def delete(self, startup_data: Dict):
+        """削除して保存する"""
+        with self._lock:
+            previous_version = data_version()
+            startups = list(self.startups)
+            delete_startup(startups, startup_data)
+            self._apply(previous_version, startups)
+
+    def patch(self, patches: Dict[str, Dict]) -> List[Tuple[Optional[Startup], Startup]]:
+        """
+        一部の項目をまとめて更新して保存し、(更新前, 更新後) のレコードの組を返す
+        手元の一覧が最新だった場合は読み込み直さず、更新したレコードだけを差し替える
+        （更新前がNoneの組は手元の一覧になかったレコード）
+        """
+        with self._lock:
+            previous_version = data_version()
+            records = _patch_records(patches)
+            if not records:
+                return []
+            positions = {startup["id"]: i for i, startup in enumerate(self.startups)}
+            startups = list(self.startups)
+            changed = []
+            for record in records:
+                startup = Startup.from_dict(record)
+                i = positions.get(record["id"])
+                if i is None:
+                    changed.append((None, startup))
+                    continue
+                changed.append((startups[i], startup))
+                startups[i] = startup
+            self._apply(previous_version, startups)
+            return changed
+
+    def restore(self, startups: List[Dict]):
+        """
+        全件をある時点の状態に戻して保存する（時点を指定した復元用）
+        その時点より後の変更はすべて取り消す（取り消した変更も差分ログに残っているので、さらに後の時点に戻し直せる）
+        """
+        with self._lock:
+            save_data(startups)
+            self.version = None
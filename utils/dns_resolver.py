@@ -0,0 +1,165 @@
+import socket
+import threading
+import time
+from concurrent.futures import wait
+from typing import Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from utils.http_client import get_executor
+
+# getaddrinfoはTTLを返さないため、システムリゾルバの結果はこの秒数だけ保持する
+DEFAULT_TTL = 300
+# 存在しないホストの保持期間（秒）
+NEGATIVE_TTL = 60
+# 名前解決をまとめて待つ上限（秒）
+RESOLVE_TIMEOUT = 2.0
+MAX_ENTRIES = 10000
+
+
+class SystemResolver:
+    """
+    OSのリゾルバ（getaddrinfo）で名前解決する
+    resolve(host) は (アドレスのリスト, TTL秒) を返し、存在しない場合は空リストを返す
+    """
+
+    def resolve(self, host: str) -> Tuple[List[str], float]:
+        try:
+            infos = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+        except (socket.gaierror, UnicodeError, ValueError):
+            return [], NEGATIVE_TTL
+        return sorted({info[4][0] for info in infos}), DEFAULT_TTL
+
+
+class DnsCache:
+    """
+    候補ホストを並列に名前解決し、結果をTTL付きで保持する
+    """
+
+    def __init__(self, resolver=None):
+        self.resolver = resolver or SystemResolver()
+        self._lock = threading.Lock()
+        self._entries = {}
+        # 解決中のホスト -> Future（同じホストを重複して問い合わせない）
+        self._inflight = {}
+
+    def _lookup(self, host: str) -> Optional[bool]:
+        with self._lock:
+            entry = self._entries.get(host)
+        if entry is None or entry[1] <= time.time():
+            return None
+        return entry[0]
+
+    def _store(self, host: str, addresses: List[str], ttl: float):
+        with self._lock:
+            self._entries[host] = (bool(addresses), time.time() + ttl)
+            while len(self._entries) > MAX_ENTRIES:
+                self._entries.pop(next(iter(self._entries)))
+
+    def _resolve(self, host: str) -> bool:
+        try:
+            addresses, ttl = self.resolver.resolve(host)
+            self._store(host, addresses, ttl)
+            return bool(addresses)
+        finally:
+            with self._lock:
+                self._inflight.pop(host, None)
+
+    def _submit(self, host: str):
+        with self._lock:
+            future = self._inflight.get(host)
+            if future is None:
+                future = get_executor().submit(self._resolve, host)
+                self._inflight[host] = future
+        return future
+
+    def resolve_many(self, hosts: Iterable[str], timeout: float = RESOLVE_TIMEOUT,
+                     incomplete: Optional[threading.Event] = None) -> Set[str]:
+        """
+        名前解決できたホストの集合を返す（時間内に解決できなかったホストは含めない）
+        timeout=0 の場合は問い合わせを開始するだけで待たない（先読み用）
+        incompleteを渡すと、時間内に解決できなかったホストがあった場合にセットする
+        """
+        resolved = set()
+        futures = {}
+        for host in set(hosts):
+            if not host or not is_valid_hostname(host):
+                continue
+            cached = self._lookup(host)
+            if cached is None:
+                futures[self._submit(host)] = host
+            elif cached:
+                resolved.add(host)
+        if futures and timeout > 0:
+            done, not_done = wait(futures, timeout=timeout)
+            if not_done and incomplete is not None:
+                incomplete.set()
+            for future in done:
+                try:
+                    if future.result():
+                        resolved.add(futures[future])
+                except Exception:
+                    continue
+        return resolved
+
+    def filter_urls(self, urls: List[str], timeout: float = RESOLVE_TIMEOUT,
+                    incomplete: Optional[threading.Event] = None) -> List[str]:
+        """ホストが名前解決できるURLだけを順序を保って返す"""
+        hosts = [_host(url) for url in urls]
+        resolved = self.resolve_many([h for h in hosts if h], timeout, incomplete)
+        return [url for url, host in zip(urls, hosts) if host in resolved]
+
+    def filter_domains(self, domains: List[str], timeout: float = RESOLVE_TIMEOUT,
+                       incomplete: Optional[threading.Event] = None) -> List[str]:
+        """名前解決できるドメインだけを順序を保って返す"""
+        resolved = self.resolve_many(domains, timeout, incomplete)
+        return [domain for domain in domains if domain in resolved]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _host(url: str) -> Optional[str]:
+    try:
+        return urlsplit(url).hostname
+    except ValueError:
+        return None
+
+
+def is_valid_hostname(host: str) -> bool:
+    """DNSで引ける形式のホスト名か（空白や不正な文字、長すぎるラベルを除外）"""
+    if not host or len(host) > 253 or '.' not in host:
+        return False
+    try:
+        ascii_host = host.encode('idna').decode('ascii')
+    except UnicodeError:
+        return False
+    for label in ascii_host.rstrip('.').split('.'):
+        if not label or len(label) > 63 or label.startswith('-') or label.endswith('-'):
+            return False
+        if not all(ch.isalnum() or ch == '-' for ch in label):
+            return False
+    return True
+
+
+_dns_cache = None
+_dns_lock = threading.Lock()
+
+
+def get_dns_cache() -> DnsCache:
+    """プロセス全体で共有するDNSキャッシュを返す"""
+    global _dns_cache
+    if _dns_cache is None:
+        with _dns_lock:
+            if _dns_cache is None:
+                _dns_cache = DnsCache()
+    return _dns_cache
+
+
+def set_resolver(resolver):
+    """
+    名前解決に使うリゾルバを差し替える（テストやベンチマークでローカルの偽リゾルバを使う場合など）
+    """
+    global _dns_cache
+    with _dns_lock:
+        _dns_cache = DnsCache(resolver)
@@ -0,0 +1,54 @@
+from typing import Dict, Optional
+
+from utils.normalize import normalize_company_name, registrable_domain
+
+
+class DuplicateIndex:
+    """
+    重複候補を定数時間で探すためのハッシュ索引
+    （正規化した会社名と、HPの登録ドメインをキーにする）
+    """
+
+    def __init__(self):
+        # キー -> {レコードID}
+        self._by_name: Dict[str, set] = {}
+        self._by_domain: Dict[str, set] = {}
+        # レコードID -> (会社名キー, ドメインキー, レコード)
+        self._entries: Dict[str, tuple] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, startup: Dict):
+        startup_id = startup["id"]
+        if startup_id in self._entries:
+            self.remove(self._entries[startup_id][2])
+        name_key = normalize_company_name(startup.get("company_name", ""))
+        domain_key = registrable_domain(startup.get("hp"))
+        self._entries[startup_id] = (name_key, domain_key, startup)
+        if name_key:
+            self._by_name.setdefault(name_key, set()).add(startup_id)
+        if domain_key:
+            self._by_domain.setdefault(domain_key, set()).add(startup_id)
+
+    def remove(self, startup: Dict):
+        entry = self._entries.pop(startup["id"], None)
+        if entry is None:
+            return
+        name_key, domain_key, _ = entry
+        for index, key in ((self._by_name, name_key), (self._by_domain, domain_key)):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(startup["id"])
+                if not ids:
+                    del index[key]
+
+    def find(self, company_name: str, hp: Optional[str] = None) -> Optional[Dict]:
+        """
+        同じ会社と思われる既存レコードを返す（会社名の一致を優先し、次にHPのドメインで探す）
+        """
+        for index, key in ((self._by_name, normalize_company_name(company_name)),
+                           (self._by_domain, registrable_domain(hp))):
+            if key and index.get(key):
+                return self._entries[next(iter(index[key]))][2]
+        return None
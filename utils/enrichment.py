@@ -0,0 +1,137 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.activity_log import append_log
+from utils.data_manager import patch_startups
+
+# enrichment_status の値
+ENRICHMENT_PENDING = "pending"
+ENRICHMENT_RUNNING = "running"
+ENRICHMENT_DONE = "done"
+ENRICHMENT_FAILED = "failed"
+
+# 同時に補完処理を行う件数
+MAX_WORKERS = 4
+# ロゴの保存に失敗した場合に再試行するまでの待ち時間（秒、失敗するたびに倍にして上限で頭打ち）
+LOGO_RETRY_AFTER = 600.0
+LOGO_RETRY_MAX = 86400.0
+
+
+def resolve_enrichment(company_name: str, hp_url: Optional[str] = None) -> Dict:
+    """
+    会社名からHP・ロゴを取得し、保存する項目を返す（入力済みのHPはそのまま使う）
+    取得できなかった項目は含めない（取得し直しの際に、保存済みの値を空で上書きしないため）
+    Streamlitに依存しないので、画面のキューとCLI（utils/reenrich.py）の両方から使う
+    """
+    # 取得処理（requests・bs4・PILなど）は画面の表示には不要なので、最初の補完のときに読み込む
+    from utils.logo_fetcher import fetch_company_logo
+    from utils.logo_store import store_logo
+    from utils.url_fetcher import fetch_company_url
+
+    logo_url = fetch_company_logo(company_name)
+    if not hp_url:
+        hp_url = fetch_company_url(company_name)
+    fields = {
+        "hp": hp_url,
+        "logo_url": logo_url,
+        "logo_path": store_logo(logo_url),
+    }
+    fields = {key: value for key, value in fields.items() if value}
+    fields.update({
+        "enrichment_status": ENRICHMENT_DONE,
+        "updated_at": datetime.now().isoformat(),
+    })
+    return fields
+
+
+class EnrichmentQueue:
+    """
+    追加済みのスタートアップのHP・ロゴをバックグラウンドで補完するワーカープール
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, patch: Callable[[Dict[str, Dict]], int] = patch_startups):
+        # {ID: 更新する項目} を保存して更新した件数を返す関数（共有の一覧に差分で反映するものに差し替えられる）
+        self._patch = patch
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="enrich")
+        self._lock = threading.Lock()
+        self._queued = set()
+        # ロゴの保存に失敗したレコード: ID -> (ロゴURL, 連続失敗回数, 再試行できる時刻)
+        self._logo_failures: Dict[str, Tuple[str, int, float]] = {}
+
+    def submit(self, startup: Dict):
+        """補完処理をキューに追加する（同じレコードの二重登録は無視する）"""
+        with self._lock:
+            if startup["id"] in self._queued:
+                return
+            self._queued.add(startup["id"])
+        self._executor.submit(self._run, startup["id"], startup["company_name"], startup.get("hp"))
+
+    def submit_logo(self, startup: Dict):
+        """
+        ロゴ画像のローカル保存だけをキューに追加する（既存レコードの移行用）
+        保存に失敗したロゴは、待ち時間が過ぎるまで（ロゴURLが変わらない限り）追加しない
+        """
+        key = ("logo", startup["id"])
+        with self._lock:
+            if key in self._queued:
+                return
+            failure = self._logo_failures.get(startup["id"])
+            if failure and failure[0] == startup["logo_url"] and time.monotonic() < failure[2]:
+                return
+            self._queued.add(key)
+        self._executor.submit(self._run_logo, startup["id"], startup["logo_url"])
+
+    def resume_pending(self, startups: List[Dict]):
+        """プロセス再起動などで中断した補完処理を再開する"""
+        for startup in startups:
+            if startup.get("enrichment_status") in (ENRICHMENT_PENDING, ENRICHMENT_RUNNING):
+                self.submit(startup)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._queued)
+
+    def _run(self, startup_id: str, company_name: str, hp_url: Optional[str] = None):
+        try:
+            if not self._patch({startup_id: {"enrichment_status": ENRICHMENT_RUNNING}}):
+                return
+            try:
+                fields = resolve_enrichment(company_name, hp_url)
+            except Exception as e:
+                self._patch({startup_id: {
+                    "enrichment_status": ENRICHMENT_FAILED,
+                    "enrichment_error": str(e),
+                }})
+                return
+
+            if self._patch({startup_id: fields}):
+                append_log({
+                    "timestamp": datetime.now().isoformat(),
+                    "action": "enrich_startup",
+                    "data": {"id": startup_id, "hp": fields.get("hp"), "logo_url": fields.get("logo_url")},
+                    "company_name": company_name,
+                })
+        finally:
+            with self._lock:
+                self._queued.discard(startup_id)
+
+    def _run_logo(self, startup_id: str, logo_url: str):
+        from utils.logo_store import store_logo
+        try:
+            logo_path = store_logo(logo_url)
+            if logo_path:
+                self._patch({startup_id: {"logo_path": logo_path}})
+            with self._lock:
+                if logo_path:
+                    self._logo_failures.pop(startup_id, None)
+                else:
+                    previous = self._logo_failures.get(startup_id)
+                    failures = previous[1] + 1 if previous and previous[0] == logo_url else 1
+                    delay = min(LOGO_RETRY_AFTER * 2 ** (failures - 1), LOGO_RETRY_MAX)
+                    self._logo_failures[startup_id] = (logo_url, failures, time.monotonic() + delay)
+        finally:
+            with self._lock:
+                self._queued.discard(("logo", startup_id))
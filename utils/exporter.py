@@ -0,0 +1,123 @@
+import csv
+import importlib.util
+import io
+import json
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from utils.data_manager import iter_startups
+
+# pyarrowは読み込みに時間がかかるので、有無だけを確認して実際の読み込みはParquet出力のときに行う
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+# CSV・Parquetの列（レコードの基本項目）
+EXPORT_FIELDS = [
+    "id", "company_name", "hp", "email", "status", "overview", "notes",
+    "logo_url", "enrichment_status", "created_at", "updated_at",
+]
+
+
+class IterStream(io.RawIOBase):
+    """
+    bytesのチャンクを返すイテレータを読み出し専用のファイルライクオブジェクトにする
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
+def open_stream(chunks: Iterable[bytes]) -> io.BufferedReader:
+    """チャンクのイテレータをダウンロード用のストリームとして開く"""
+    return io.BufferedReader(IterStream(chunks))
+
+
+def export_json(batches: Iterable[List[Dict]]) -> Iterator[bytes]:
+    """復元にそのまま使えるJSON配列として出力する"""
+    yield b"["
+    first = True
+    for batch in batches:
+        parts = []
+        for startup in batch:
+            parts.append(("" if first else ",") + "\n" + json.dumps(startup, ensure_ascii=False))
+            first = False
+        yield "".join(parts).encode('utf-8')
+    yield b"\n]\n"
+
+
+def export_ndjson(batches: Iterable[List[Dict]]) -> Iterator[bytes]:
+    """1行1レコードのJSON Linesとして出力する"""
+    for batch in batches:
+        yield "".join(json.dumps(s, ensure_ascii=False) + "\n" for s in batch).encode('utf-8')
+
+
+def export_csv(batches: Iterable[List[Dict]]) -> Iterator[bytes]:
+    """CSVとして出力する（Excelで開けるようBOM付きUTF-8）"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    yield ("\ufeff" + buffer.getvalue()).encode('utf-8')
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue().encode('utf-8')
+
+
+def export_parquet(batches: Iterable[List[Dict]]) -> Iterator[bytes]:
+    """
+    Parquetとして出力する（バッチごとに行グループを書き込む。pyarrowが必要）
+    """
+    if not HAS_PYARROW:
+        raise RuntimeError("Parquet出力には pyarrow が必要です")
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(field, pa.string()) for field in EXPORT_FIELDS])
+    sink = io.BytesIO()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in batches:
+            frame = pd.DataFrame(batch).reindex(columns=EXPORT_FIELDS)
+            frame = frame.astype(object).where(frame.notna(), None)
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            # 書き込み済みの分だけを返してバッファを空にする
+            data = sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+            if data:
+                yield data
+    data = sink.getvalue()
+    if data:
+        yield data
+
+
+# 形式名 -> (出力関数, 拡張子, MIMEタイプ)
+EXPORT_FORMATS: Dict[str, tuple] = {
+    "JSON": (export_json, "json", "application/json"),
+    "NDJSON": (export_ndjson, "jsonl", "application/x-ndjson"),
+    "CSV": (export_csv, "csv", "text/csv"),
+}
+if HAS_PYARROW:
+    EXPORT_FORMATS["Parquet"] = (export_parquet, "parquet", "application/vnd.apache.parquet")
+
+
+def export_startups(fmt: str, statuses: Optional[List[str]] = None, batch_size: int = 500) -> Iterator[bytes]:
+    """
+    ストレージからバッチ単位で読み出しながら指定形式で出力する
+    """
+    exporter = EXPORT_FORMATS[fmt][0]
+    return exporter(iter_startups(statuses, batch_size))
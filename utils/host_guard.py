@@ -0,0 +1,211 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+# ホストごとの (1秒あたりのリクエスト数, バースト) 。検索エンジンは特に控えめにする
+HOST_LIMITS: Dict[str, Tuple[float, int]] = {
+    "www.google.com": (1.0, 5),
+    "search.yahoo.co.jp": (1.0, 3),
+    "logo.clearbit.com": (5.0, 10),
+}
+# 上記以外のホスト（会社のサイトなど）
+DEFAULT_LIMIT = (10.0, 20)
+
+# 連続でこの回数失敗したら遮断する
+FAILURE_THRESHOLD = 5
+# 失敗による遮断の時間（秒）
+FAILURE_COOLDOWN = 60.0
+# 429やCAPTCHAページによる遮断の時間（秒、Retry-Afterがあればそちらを優先）
+BLOCK_COOLDOWN = 300.0
+# 状態を保持するホスト数の上限（古いものから捨てる）
+MAX_HOSTS = 1024
+
+# アクセス制限（CAPTCHA）ページの目印
+BLOCK_MARKERS = [
+    "/sorry/index",
+    "unusual traffic from your computer network",
+    "異常なトラフィックが検出されました",
+    "g-recaptcha",
+]
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class HostBlocked(requests.RequestException):
+    """遮断中のホストへのリクエスト"""
+
+
+class RateLimited(requests.RequestException):
+    """待ち時間の上限までにリクエストの枠が空かなかった"""
+
+
+def looks_blocked(text: str) -> bool:
+    """レスポンス本文がアクセス制限（CAPTCHA）ページに見えるか"""
+    head = text[:20000].lower()
+    return any(marker.lower() in head for marker in BLOCK_MARKERS)
+
+
+def raise_if_blocked(host: str, response: requests.Response):
+    """
+    429や/sorry/へのリダイレクトを HostBlocked として送出する
+    （「候補がなかった」「存在しない」と区別し、呼び出し側で結果をキャッシュしないようにする）
+    """
+    if response.status_code == 429 or "/sorry/" in (response.url or ""):
+        raise HostBlocked(f"{host} に遮断されました（HTTP {response.status_code}）")
+
+
+class _HostState:
+    __slots__ = ("rate", "burst", "tokens", "updated", "state", "failures", "open_until", "reason")
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.state = CLOSED
+        self.failures = 0
+        self.open_until = 0.0
+        self.reason = None
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class HostGuard:
+    """
+    ホストごとのトークンバケットによる流量制限とサーキットブレーカー（プロセス全体で共有）
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, int]]] = None, default_limit=DEFAULT_LIMIT):
+        self._lock = threading.Lock()
+        self._limits = dict(HOST_LIMITS if limits is None else limits)
+        self._default_limit = default_limit
+        self._hosts: "OrderedDict[str, _HostState]" = OrderedDict()
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(*self._limits.get(host, self._default_limit))
+            self._hosts[host] = state
+            if len(self._hosts) > MAX_HOSTS:
+                self._hosts.popitem(last=False)
+        else:
+            self._hosts.move_to_end(host)
+        return state
+
+    def is_open(self, host: str) -> bool:
+        """遮断中か（待機時間が過ぎていれば試行を1回だけ許す）"""
+        with self._lock:
+            state = self._hosts.get(host)
+            return state is not None and state.state == OPEN and time.monotonic() < state.open_until
+
+    def acquire(self, host: str, max_wait: float = 0.0):
+        """
+        リクエストの枠を1つ確保する（足りなければ max_wait 秒まで待つ）
+        遮断中は HostBlocked、待ち時間が足りなければ RateLimited
+        """
+        with self._lock:
+            state = self._state(host)
+            now = time.monotonic()
+            if state.state == OPEN:
+                if now < state.open_until:
+                    raise HostBlocked(f"{host} は遮断中です（{state.reason}）")
+                # 待機時間が過ぎたら1回だけ試す
+                state.state = HALF_OPEN
+            elif state.state == HALF_OPEN:
+                raise HostBlocked(f"{host} は試行中です")
+            state.refill(now)
+            wait = 0.0 if state.tokens >= 1 else (1 - state.tokens) / state.rate
+            if wait > max_wait:
+                if state.state == HALF_OPEN:
+                    state.state = OPEN
+                raise RateLimited(f"{host} のリクエスト枠が空いていません")
+            # 先に枠を予約してから、ロックの外で待つ
+            state.tokens -= 1
+        if wait > 0:
+            time.sleep(wait)
+
+    def record_success(self, host: str):
+        with self._lock:
+            state = self._state(host)
+            state.failures = 0
+            state.state = CLOSED
+            state.reason = None
+
+    def record_failure(self, host: str, reason: str = "error"):
+        """失敗を記録する（連続してFAILURE_THRESHOLD回失敗したら遮断する）"""
+        with self._lock:
+            state = self._state(host)
+            state.failures += 1
+            if state.state == HALF_OPEN or state.failures >= FAILURE_THRESHOLD:
+                self._open(state, FAILURE_COOLDOWN, reason)
+
+    def record_block(self, host: str, retry_after: Optional[float] = None, reason: str = "blocked"):
+        """429やCAPTCHAページを受け取った場合はすぐに遮断する"""
+        with self._lock:
+            state = self._state(host)
+            state.failures += 1
+            self._open(state, retry_after if retry_after else BLOCK_COOLDOWN, reason)
+
+    def record_response(self, host: str, response: requests.Response):
+        """レスポンスの内容から成功・失敗・遮断を記録する"""
+        if response.status_code == 429 or "/sorry/" in (response.url or ""):
+            self.record_block(host, _retry_after(response), reason=f"HTTP {response.status_code}")
+        elif response.status_code >= 500:
+            self.record_failure(host, reason=f"HTTP {response.status_code}")
+        else:
+            self.record_success(host)
+
+    @staticmethod
+    def _open(state: _HostState, cooldown: float, reason: str):
+        state.state = OPEN
+        state.open_until = time.monotonic() + cooldown
+        state.reason = reason
+
+    def rows(self) -> List[Dict]:
+        """デバッグ表示用に、制限が設定されたホストと遮断中・失敗中のホストの状態を返す"""
+        now = time.monotonic()
+        rows = []
+        with self._lock:
+            for host, state in self._hosts.items():
+                if host not in self._limits and state.state == CLOSED and not state.failures:
+                    continue
+                state.refill(now)
+                rows.append({
+                    "host": host,
+                    "state": state.state,
+                    "tokens": f"{max(state.tokens, 0):.1f}/{state.burst}",
+                    "failures": state.failures,
+                    "reopen_in": f"{max(state.open_until - now, 0):.0f}s" if state.state == OPEN else "",
+                    "reason": state.reason or "",
+                })
+        return rows
+
+    def reset(self, host: Optional[str] = None):
+        """状態を消す（hostを省略した場合は全ホスト）"""
+        with self._lock:
+            if host is None:
+                self._hosts.clear()
+            else:
+                self._hosts.pop(host, None)
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+_guard = HostGuard()
+
+
+def get_host_guard() -> HostGuard:
+    """全セッションで共有する流量制限・遮断の状態を返す"""
+    return _guard
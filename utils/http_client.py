@@ -0,0 +1,117 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import time
+from typing import Callable, Iterable, Optional, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.host_guard import HostBlocked, RateLimited
+
+# 同時に投げるプローブ数の上限（スレッド数とコネクションプール数を揃える）
+MAX_WORKERS = 32
+
+_session = None
+_executor = None
+_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    全プローブで共有するkeep-alive付きのSessionを返す
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    プロセス全体で共有するプローブ用スレッドプールを返す
+    """
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="probe")
+    return _executor
+
+
+def _run_probe(probe, candidate, cancel_event, incomplete):
+    # 勝者が決まった後に開始されたプローブはリクエストを送らない
+    if cancel_event.is_set():
+        return None
+    try:
+        return probe(candidate, cancel_event)
+    except HostBlocked:
+        # 遮断で確認できなかった候補は「失敗」とは確定しない
+        if incomplete is not None:
+            incomplete.set()
+        return None
+    except RateLimited:
+        # 自前の流量制限で送らなかった候補は「失敗」として扱う（遮断ではないのでキャッシュは妨げない）
+        return None
+    except Exception:
+        return None
+
+
+def race(candidates: Iterable[Any], probe: Callable[[Any, threading.Event], Optional[Any]],
+         timeout: Optional[float] = None, incomplete: Optional[threading.Event] = None) -> Optional[Any]:
+    """
+    候補を並列にプローブし、優先度（候補の並び順）が最も高い成功結果を返す
+
+    probe(candidate, cancel_event) は成功時に値、失敗時にNoneを返す。
+    上位の候補がすべて失敗と確定した時点で結果を返し、残りのプローブはキャンセルする。
+    timeoutを超えた場合はそれまでに成功した候補のうち最上位のものを返す。
+    incompleteを渡すと、遮断（HostBlocked）やtimeoutで確認しきれなかった
+    上位の候補があった場合にセットする（呼び出し側はその結果をキャッシュしない）
+    """
+    candidates = list(candidates)
+    if not candidates:
+        return None
+
+    executor = get_executor()
+    cancel_event = threading.Event()
+    futures = [executor.submit(_run_probe, probe, c, cancel_event, incomplete) for c in candidates]
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    head = 0
+
+    try:
+        pending = set(futures)
+        while head < len(futures):
+            # 先頭から確定済みの候補を順に確認する
+            while head < len(futures) and futures[head].done():
+                result = futures[head].result()
+                if result is not None:
+                    return result
+                head += 1
+            if head >= len(futures):
+                break
+
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # 結果が確定していない上位の候補を残して打ち切る
+                    if incomplete is not None:
+                        incomplete.set()
+                    break
+            pending = {f for f in pending if not f.done()}
+            wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+        # タイムアウト時は完了済みの中で最上位の成功を返す
+        for future in futures[head:]:
+            if future.done() and future.result() is not None:
+                return future.result()
+        return None
+    finally:
+        cancel_event.set()
+        for future in futures:
+            future.cancel()
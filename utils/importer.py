@@ -0,0 +1,229 @@
+import io
+import json
+from datetime import datetime
+from typing import BinaryIO, Callable, Dict, Iterator, Optional, Tuple
+
+from utils.data_manager import bulk_write, iter_startups
+from utils.normalize import normalize_company_name
+from utils.views import STATUSES
+
+# 1回に読み込むバイト数
+CHUNK_SIZE = 64 * 1024
+# 1回のトランザクション内で書き込む件数
+BATCH_SIZE = 500
+# 結果に残すエラーの最大件数
+MAX_ERRORS = 200
+# 1件のレコード（JSON Linesの場合は1行）の最大文字数（これを超えても解析できない場合はエラーにする）
+MAX_RECORD_CHARS = 1024 * 1024
+
+MODE_MERGE = "merge"
+MODE_REPLACE = "replace"
+
+# 文字列であるべき項目
+STRING_FIELDS = ["id", "hp", "email", "overview", "notes", "logo_url", "logo_path", "enrichment_status"]
+
+
+class RestoreError(Exception):
+    """ファイル全体が読めない場合のエラー（この場合は何も書き込まない）"""
+
+
+class InvalidRecord:
+    """JSON Linesの読めなかった1行（取り込みではその行だけをエラーとして記録する）"""
+
+    def __init__(self, message: str):
+        self.message = message
+
+
+def iter_json_records(fileobj: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[object]:
+    """
+    JSON配列またはJSON Lines（1行1レコード）を先頭から少しずつ読み、1件ずつ返す
+    ファイル全体をメモリに載せない
+    JSON Linesの読めない行は InvalidRecord として返す（JSON配列は途中から読み直せないので RestoreError）
+    """
+    reader = io.TextIOWrapper(fileobj, encoding='utf-8-sig')
+    try:
+        # 先頭の空白以外の1文字で形式を判定する
+        first = reader.read(1)
+        while first and first in " \t\r\n":
+            first = reader.read(1)
+        if first == "[":
+            yield from _iter_decoded(reader, chunk_size)
+        elif first:
+            yield from _iter_lines(reader, first, chunk_size)
+    finally:
+        # 呼び出し元のファイルを閉じないよう切り離す
+        reader.detach()
+
+
+def _iter_lines(reader, first, chunk_size):
+    """JSON Linesを1行ずつ解析する（1行が壊れていても次の行から読み続ける）"""
+    line = first + reader.readline(MAX_RECORD_CHARS)
+    while line:
+        if not line.endswith("\n") and len(line) >= MAX_RECORD_CHARS:
+            # 長すぎる行は残りを読み捨てて次の行に進む
+            rest = line
+            while rest and not rest.endswith("\n"):
+                rest = reader.readline(chunk_size)
+            yield InvalidRecord(f"1行が長すぎます（{MAX_RECORD_CHARS}文字まで）")
+        elif line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield InvalidRecord(f"JSONの解析に失敗しました: {e}")
+        line = reader.readline(MAX_RECORD_CHARS)
+
+
+def _iter_decoded(reader, chunk_size):
+    """JSON配列（先頭の [ は読み込み済み）の要素を1件ずつ返す"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    count = 0
+
+    def fill(min_size=0):
+        nonlocal buffer, pos, eof
+        chunk = reader.read(max(chunk_size, min_size))
+        if not chunk:
+            eof = True
+        if pos:
+            buffer = buffer[pos:] + chunk
+            pos = 0
+        else:
+            buffer += chunk
+
+    def skip(chars):
+        # 空白と区切り文字を読み飛ばす（足りなければ読み足す）
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    fill()
+    while True:
+        skip(" \t\r\n,")
+        if pos >= len(buffer):
+            raise RestoreError("JSON配列が閉じられていません")
+        if buffer[pos] == "]":
+            return
+        while True:
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+                # 数値などがチャンクの境目で切れている可能性があるので、末尾まで達した場合は読み足す
+                if end == len(buffer) and not eof:
+                    raise ValueError
+                break
+            except ValueError:
+                if eof:
+                    raise RestoreError(f"JSONの解析に失敗しました（{count + 1}件目）")
+                pending = len(buffer) - pos
+                if pending > MAX_RECORD_CHARS:
+                    raise RestoreError(f"{count + 1}件目のレコードが大きすぎるか、JSONが壊れています")
+                # 読み足す量を倍々に増やし、同じ部分を解析し直す回数を抑える
+                fill(pending)
+        pos = end
+        count += 1
+        yield record
+
+
+def validate_startup(record: object) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    レコードを検証して (正規化したレコード, エラーメッセージ) を返す
+    """
+    if isinstance(record, InvalidRecord):
+        return None, record.message
+    if not isinstance(record, dict):
+        return None, "レコードがオブジェクトではありません"
+    company_name = record.get("company_name")
+    if not isinstance(company_name, str) or not company_name.strip():
+        return None, "company_name がありません"
+    if record.get("status") not in STATUSES:
+        return None, f"status が不正です: {record.get('status')!r}"
+    for field in STRING_FIELDS:
+        value = record.get(field)
+        if value is not None and not isinstance(value, str):
+            return None, f"{field} が文字列ではありません"
+    for field in ("created_at", "updated_at"):
+        value = record.get(field)
+        if value is None:
+            continue
+        try:
+            datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None, f"{field} の日時形式が不正です: {value!r}"
+    startup = dict(record)
+    startup["company_name"] = company_name.strip()
+    return startup, None
+
+
+def import_startups(fileobj: BinaryIO, mode: str = MODE_MERGE,
+                    progress: Optional[Callable[[float, Dict], None]] = None,
+                    total_bytes: Optional[int] = None) -> Dict:
+    """
+    アップロードされたファイルを検証しながらバッチ単位で取り込む
+
+    mode=merge: 既存データに追加する（同じIDは上書き、同じ会社名のIDなしレコードは重複としてスキップ）
+    mode=replace: 既存データを置き換える（ファイル全体が読めない場合は既存データを残す）
+    戻り値は {"imported", "skipped", "errors": [(件目, メッセージ)], "error_count"}
+    """
+    result = {"imported": 0, "skipped": 0, "errors": [], "error_count": 0}
+
+    # 会社名による重複判定（置き換えの場合はファイル内の重複のみ）
+    seen_ids = set()
+    seen_names = set()
+    if mode == MODE_MERGE:
+        for batch in iter_startups():
+            for startup in batch:
+                seen_names.add(normalize_company_name(startup["company_name"]))
+
+    def report_error(index, message):
+        result["error_count"] += 1
+        if len(result["errors"]) < MAX_ERRORS:
+            result["errors"].append((index, message))
+
+    def batches():
+        batch = []
+        for index, record in enumerate(iter_json_records(fileobj), start=1):
+            startup, error = validate_startup(record)
+            if error:
+                report_error(index, error)
+                continue
+            startup_id = startup.get("id")
+            name_key = normalize_company_name(startup["company_name"])
+            if startup_id:
+                if startup_id in seen_ids:
+                    result["skipped"] += 1
+                    continue
+                seen_ids.add(startup_id)
+            elif name_key in seen_names:
+                result["skipped"] += 1
+                continue
+            seen_names.add(name_key)
+            batch.append(startup)
+            if len(batch) >= BATCH_SIZE:
+                yield batch
+                result["imported"] += len(batch)
+                batch = []
+                if progress is not None:
+                    _report_progress(progress, fileobj, total_bytes, result)
+        if batch:
+            yield batch
+            result["imported"] += len(batch)
+        if progress is not None:
+            progress(1.0, result)
+
+    bulk_write(batches(), replace=(mode == MODE_REPLACE))
+    return result
+
+
+def _report_progress(progress, fileobj, total_bytes, result):
+    fraction = 0.0
+    if total_bytes:
+        try:
+            fraction = min(fileobj.tell() / total_bytes, 1.0)
+        except (OSError, ValueError):
+            pass
+    progress(fraction, result)
@@ -0,0 +1,225 @@
+import glob
+import gzip
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # Windowsではプロセス間のロックは取らない（同じプロセス内のスレッドだけを直列化する）
+    fcntl = None
+
+JOURNAL_DIR = "data/journal"
+# 差分ログへの追記とスナップショットの切り替えを他のプロセスと直列化するためのロックファイル
+LOCK_FILE = ".lock"
+
+# 前回のスナップショットからこの操作数・サイズを超えたら新しいスナップショットを書く
+# （復元時に再適用する差分の量がこれで頭打ちになる）
+SNAPSHOT_EVERY = 1000
+SNAPSHOT_MAX_DELTA_BYTES = 8 * 1024 * 1024
+# この日数前までの任意の時点に戻せるようにスナップショットを残す（それより古いものは差分ごと削除する）
+# バックグラウンドの更新で差分が増えてスナップショットが増えても、戻せる期間は短くならない
+KEEP_DAYS = 30
+# 残しておくスナップショットの数の上限（ディスクを使い切らないための保険）
+MAX_SNAPSHOTS = 500
+
+OP_PUT = "put"
+OP_DELETE = "delete"
+
+STAMP_FORMAT = "%Y%m%dT%H%M%S%f"
+
+
+class JournalError(Exception):
+    """指定した時点の状態を復元できない"""
+
+
+def _stamp_time(stamp: str) -> datetime:
+    return datetime.strptime(stamp, STAMP_FORMAT)
+
+
+class Journal:
+    """
+    スナップショット（全件を圧縮したもの）と、その後の追加・更新・削除の差分ログ
+    ある時点の状態は、その時点より前の最新のスナップショットに差分を再適用して作る
+
+    data/journal/snapshot-<日時>.json.gz  その時点の全件
+    data/journal/delta-<日時>.jsonl       上のスナップショットの後の操作（1行1操作の追記のみ）
+    """
+
+    def __init__(self, directory: str = JOURNAL_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # 現在の差分ログの操作数（プロセスごとの概算、スナップショットの要否の判定に使う）
+        self._ops = None
+
+    def _path(self, kind: str, stamp: str) -> str:
+        ext = "json.gz" if kind == "snapshot" else "jsonl"
+        return os.path.join(self.directory, f"{kind}-{stamp}.{ext}")
+
+    @contextmanager
+    def _exclusive(self):
+        """
+        差分ログへの追記とスナップショットの切り替えを、他のスレッド・プロセスと直列化する
+        （切り替えの最中に古い差分ログへ追記され、その操作がどちらにも残らないことを防ぐ）
+        """
+        with self._file_lock:
+            if fcntl is None:
+                yield
+                return
+            fd = os.open(os.path.join(self.directory, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                # 閉じるとロックも外れる
+                os.close(fd)
+
+    def stamps(self) -> List[str]:
+        """スナップショットの日時（古い順）"""
+        prefix = os.path.join(self.directory, "snapshot-")
+        return sorted(path[len(prefix):-len(".json.gz")] for path in glob.glob(prefix + "*.json.gz"))
+
+    def has_snapshot(self) -> bool:
+        return bool(self.stamps())
+
+    def record(self, op: str, startups: Optional[List[Dict]] = None, ids: Optional[List[str]] = None):
+        """
+        操作を現在の差分ログに1行追記する（O_APPENDによる1回の書き込みなので他プロセスと混ざらない）
+        最新のスナップショットの確認から追記までは、スナップショットの切り替えと重ならないようロックの中で行う
+        """
+        entry = {"ts": datetime.now().isoformat(), "op": op}
+        if op == OP_PUT:
+            entry["startups"] = startups
+        else:
+            entry["ids"] = ids
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode('utf-8')
+        with self._exclusive():
+            stamps = self.stamps()
+            if not stamps:
+                raise JournalError("スナップショットがありません")
+            path = self._path("delta", stamps[-1])
+            with self._lock:
+                fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, line)
+                finally:
+                    os.close(fd)
+                if self._ops is None:
+                    self._ops = self._count_ops(path)
+                else:
+                    self._ops += 1
+
+    @staticmethod
+    def _count_ops(path: str) -> int:
+        try:
+            with open(path, 'rb') as f:
+                return sum(1 for _ in f)
+        except FileNotFoundError:
+            return 0
+
+    def snapshot_due(self) -> bool:
+        """差分ログが大きくなり、新しいスナップショットを書くべきか"""
+        stamps = self.stamps()
+        if not stamps:
+            return True
+        path = self._path("delta", stamps[-1])
+        with self._lock:
+            if self._ops is None:
+                self._ops = self._count_ops(path)
+            if self._ops >= SNAPSHOT_EVERY:
+                return True
+        try:
+            return os.path.getsize(path) >= SNAPSHOT_MAX_DELTA_BYTES
+        except FileNotFoundError:
+            return False
+
+    def write_snapshot(self, load: Callable[[], Iterable[Dict]]) -> str:
+        """
+        全件のスナップショットを書き、以降の操作は新しい差分ログに追記する
+        全件は load() でロックの中で読み直す（読んだ後・切り替える前に他のプロセスが書いた操作を取りこぼさない）
+        """
+        with self._exclusive():
+            stamp = datetime.now().strftime(STAMP_FORMAT)
+            path = self._path("snapshot", stamp)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+                    json.dump(list(load()), f, ensure_ascii=False)
+                os.replace(tmp, path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            with self._lock:
+                self._ops = 0
+            self._prune()
+        return stamp
+
+    def _prune(self):
+        stamps = self.stamps()
+        cutoff = datetime.now() - timedelta(days=KEEP_DAYS)
+        # 次のスナップショットが期間内にあるものは、期間の始めの時点を作るのに使うので残す
+        expired = sum(1 for following in stamps[1:] if _stamp_time(following) <= cutoff)
+        for stamp in stamps[:max(expired, len(stamps) - MAX_SNAPSHOTS)]:
+            for kind in ("snapshot", "delta"):
+                try:
+                    os.remove(self._path(kind, stamp))
+                except FileNotFoundError:
+                    pass
+
+    def restore_points(self) -> Dict:
+        """復元できる範囲（最も古いスナップショットの日時〜現在）"""
+        stamps = self.stamps()
+        return {"oldest": _stamp_time(stamps[0]) if stamps else None, "snapshots": len(stamps)}
+
+    def state_at(self, when: datetime) -> List[Dict]:
+        """
+        when 時点の全件を返す（when 以前の最新のスナップショットに、when までの差分を適用する）
+        """
+        stamps = [stamp for stamp in self.stamps() if _stamp_time(stamp) <= when]
+        if not stamps:
+            raise JournalError("指定した日時より前のスナップショットがありません")
+        stamp = stamps[-1]
+        with gzip.open(self._path("snapshot", stamp), 'rt', encoding='utf-8') as f:
+            state = {startup["id"]: startup for startup in json.load(f)}
+        limit = when.isoformat()
+        try:
+            with open(self._path("delta", stamp), 'rb') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 書き込み途中の最後の行など
+                        continue
+                    # ISO形式の日時は文字列のまま比較できる
+                    if entry["ts"] > limit:
+                        break
+                    if entry["op"] == OP_PUT:
+                        for startup in entry["startups"]:
+                            state[startup["id"]] = startup
+                    elif entry["op"] == OP_DELETE:
+                        for startup_id in entry["ids"]:
+                            state.pop(startup_id, None)
+        except FileNotFoundError:
+            pass
+        return list(state.values())
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal() -> Journal:
+    """全セッションで共有する差分ログを返す"""
+    global _journal
+    if _journal is None:
+        with _journal_lock:
+            if _journal is None:
+                _journal = Journal()
+    return _journal
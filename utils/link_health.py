@@ -0,0 +1,142 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from utils.data_manager import patch_startups
+from utils.metrics import metrics
+
+# 再確認する項目
+LINK_FIELDS = ["hp", "logo_url"]
+# 正常だったURLを再確認するまでの期間
+RECHECK_AFTER = timedelta(days=7)
+# 失敗したURLを再確認するまでの期間
+RECHECK_FAILED_AFTER = timedelta(days=1)
+# 連続でこの回数失敗したらリンク切れとして表示する
+BROKEN_AFTER = 3
+# 1回のバッチで確認するレコード数
+BATCH_SIZE = 10
+# バッチの実行間隔（秒、0の場合は実行しない）
+BATCH_INTERVAL = float(os.environ.get("LINK_HEALTH_INTERVAL", "60"))
+# 1件ごとのリクエスト間隔（秒）
+REQUEST_INTERVAL = 1.0
+
+
+def link_status(startup, field: str) -> Optional[Dict]:
+    """保存済みの確認結果を返す（未確認・URLが変わった場合はNone）"""
+    status = (startup.get("link_health") or {}).get(field)
+    if not status or status.get("url") != startup.get(field):
+        return None
+    return status
+
+
+def is_broken(startup, field: str) -> bool:
+    """連続して確認に失敗しているか"""
+    status = link_status(startup, field)
+    return status is not None and status.get("failures", 0) >= BROKEN_AFTER
+
+
+def _is_due(status: Optional[Dict], now: datetime) -> bool:
+    if status is None:
+        return True
+    period = RECHECK_AFTER if status.get("ok") else RECHECK_FAILED_AFTER
+    # ISO形式の日時は文字列のまま比較できる
+    return status.get("checked_at", "") <= (now - period).isoformat()
+
+
+class LinkHealthScheduler:
+    """
+    保存済みのHP・ロゴURLをバックグラウンドで少しずつ再確認する
+    ETag・Last-Modifiedによる条件付きリクエストを使うので、変更がなければ304で済む
+    確認結果はバッチごとにまとめて書き戻す
+    """
+
+    def __init__(self, source: Callable[[], List], batch_size: int = BATCH_SIZE,
+                 interval: float = BATCH_INTERVAL, request_interval: float = REQUEST_INTERVAL,
+                 patch: Callable[[Dict[str, Dict]], int] = patch_startups):
+        # 確認対象の一覧を返す関数（共有の一覧を使えばファイルを読まずに済む）
+        self._source = source
+        # 確認結果を書き戻す関数（共有の一覧に差分で反映するものに差し替えられる）
+        self._patch = patch
+        self.batch_size = batch_size
+        self.interval = interval
+        self.request_interval = request_interval
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_run = None
+        self.checked = 0
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self._loop, name="link-health", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        # 起動直後の読み込みと重ならないよう、最初のバッチも1周期待ってから始める
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_batch()
+            except Exception:
+                metrics.incr("link_check_errors_total")
+
+    def due(self, startups: List, now: Optional[datetime] = None) -> List:
+        """再確認が必要なレコードをbatch_size件まで返す"""
+        now = now or datetime.now()
+        batch = []
+        for startup in startups:
+            if any(startup.get(field) and _is_due(link_status(startup, field), now) for field in LINK_FIELDS):
+                batch.append(startup)
+                if len(batch) >= self.batch_size:
+                    break
+        return batch
+
+    def run_batch(self) -> int:
+        """1バッチ分を確認して書き戻し、確認したレコード数を返す"""
+        # 取得処理は最初のバッチのときに読み込む（起動時には不要）
+        from utils.url_fetcher import check_url
+        now = datetime.now()
+        patches = {}
+        for startup in self.due(self._source(), now):
+            if self._stop.is_set():
+                break
+            health = dict(startup.get("link_health") or {})
+            for field in LINK_FIELDS:
+                url = startup.get(field)
+                previous = link_status(startup, field)
+                if not url or not _is_due(previous, now):
+                    continue
+                previous = previous or {}
+                result = check_url(url, previous.get("etag"), previous.get("last_modified"), stage="revalidate")
+                if result["skipped"]:
+                    # 流量制限・遮断で確認できなかった場合は前回の結果をそのまま残す（失敗には数えない）
+                    metrics.incr("link_checks_total", field=field, result="skipped")
+                    continue
+                health[field] = {
+                    "url": url,
+                    "ok": result["ok"],
+                    "status": result["status"],
+                    "etag": result["etag"],
+                    "last_modified": result["last_modified"],
+                    "checked_at": datetime.now().isoformat(),
+                    "failures": 0 if result["ok"] else previous.get("failures", 0) + 1,
+                }
+                if result["not_modified"]:
+                    outcome = "not_modified"
+                else:
+                    outcome = "ok" if result["ok"] else "failed"
+                metrics.incr("link_checks_total", field=field, result=outcome)
+                # リクエストを時間的に分散させる
+                if self._stop.wait(self.request_interval):
+                    break
+            if health != (startup.get("link_health") or {}):
+                patches[startup["id"]] = {"link_health": health}
+        if patches:
+            self._patch(patches)
+        self.last_run = now
+        self.checked += len(patches)
+        return len(patches)
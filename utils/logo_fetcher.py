@@ -1,7 +1,23 @@
-import requests
-import streamlit as st
-from urllib.parse import quote
-import time
+import logging
+import threading
+from utils.http_client import race
+from utils.metrics import metrics, instrumented_request
+from utils.resolution_cache import get_cache, MISS
+from utils.dns_resolver import get_dns_cache
+from utils.host_guard import get_host_guard, raise_if_blocked
+
+CLEARBIT_HOST = "logo.clearbit.com"
+
+# エラーは画面ではなくロガーに出す（バックグラウンドのスレッドやCLIからも呼ばれるため）
+logger = logging.getLogger(__name__)
+
+def _probe_clearbit(clearbit_url, cancel_event):
+    """Clearbitにロゴが存在すればそのURLを返す"""
+    response = instrumented_request("logo", "HEAD", clearbit_url, timeout=3)
+    raise_if_blocked(CLEARBIT_HOST, response)
+    if response.status_code == 200:
+        return clearbit_url
+    return None
 
 def fetch_company_logo(company_name):
     """
@@ -9,41 +25,61 @@ def fetch_company_logo(company_name):
     複数のAPIを試行し、最初に成功したものを返す
     """
     
-    # Clearbit Logo API (無料で利用可能)
-    try:
-        # 会社名からドメインを推測
-        clean_name = company_name.lower().replace(' ', '').replace(',', '').replace('.', '').replace('株式会社', '').replace('inc', '').replace('ltd', '')
-        domain_guess = f"{clean_name}.com"
-        clearbit_url = f"https://logo.clearbit.com/{domain_guess}"
-        
-        response = requests.head(clearbit_url, timeout=5)  # HEAD request for faster check
-        if response.status_code == 200:
-            return clearbit_url
-    except Exception as e:
-        st.write(f"Clearbit API エラー: {str(e)}")
+    cache = get_cache()
+    cached = cache.get("logo", company_name)
+    if cached is not MISS:
+        metrics.incr("logo_lookups_total", result="cached")
+        return cached
+    
+    with metrics.timer("logo_lookup_seconds"):
+        logo_url, complete = _resolve_company_logo(company_name)
+    source = "clearbit" if logo_url and "clearbit" in logo_url else ("favicon" if logo_url else "none")
+    metrics.incr("logo_lookups_total", result=source)
+    metrics.maybe_write_snapshot()
+    # Clearbitを飛ばした・遮断や名前解決の時間切れで確認できなかった場合の代替結果はキャッシュしない（次回に取り直す）
+    if complete:
+        cache.set("logo", company_name, logo_url)
+    return logo_url
+
+def _resolve_company_logo(company_name):
+    """
+    ネットワークを使って会社名からロゴURLを探索する
+    (ロゴURL, 結果をキャッシュしてよいか) を返す
+    """
     
-    # 一般的なドメインパターンを試行
+    # 会社名からドメインを推測
+    clean_name = company_name.lower().replace(' ', '').replace(',', '').replace('.', '').replace('株式会社', '').replace('inc', '').replace('ltd', '')
+    
+    # Clearbit Logo API (無料で利用可能) + 一般的なドメインパターン
     domain_patterns = [
+        f"{clean_name}.com",
         f"{clean_name}.co.jp",
         f"{clean_name}.jp", 
         f"{clean_name}.net",
         f"{clean_name}.org"
     ]
     
-    for domain in domain_patterns:
-        try:
-            clearbit_url = f"https://logo.clearbit.com/{domain}"
-            response = requests.head(clearbit_url, timeout=3)
-            if response.status_code == 200:
-                return clearbit_url
-        except:
-            continue
+    # 名前解決できないドメインはClearbitに問い合わせない
+    # （時間内に解決できなかったドメインがあれば incomplete がセットされる）
+    incomplete = threading.Event()
+    domain_patterns = get_dns_cache().filter_domains(domain_patterns, incomplete=incomplete)
     
-    # Google Favicon API (バックアップ)
+    # Clearbitが遮断中（429など）の場合は問い合わせない
+    if get_host_guard().is_open(CLEARBIT_HOST):
+        metrics.incr("logo_clearbit_skipped_total")
+        incomplete.set()
+        domain_patterns = []
+    
+    # 候補は並列に確認し、並び順で最上位の成功を採用する
+    # （遮断で確認できなかった候補があれば incomplete がセットされる）
     try:
-        favicon_url = f"https://www.google.com/s2/favicons?sz=64&domain={clean_name}.com"
-        return favicon_url
-    except:
-        pass
+        result = race([f"https://{CLEARBIT_HOST}/{domain}" for domain in domain_patterns], _probe_clearbit,
+                      incomplete=incomplete)
+        if result:
+            return result, not incomplete.is_set()
+    except Exception as e:
+        logger.warning("Clearbit API エラー: %s", e)
     
-    return None
+    # Google Favicon API (バックアップ)
+    favicon_url = f"https://www.google.com/s2/favicons?sz=64&domain={clean_name}.com"
+    return favicon_url, not incomplete.is_set()
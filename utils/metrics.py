@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Tuple
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    import requests
+
+METRICS_FILE = "data/metrics.prom"
+# スナップショットファイルを書き出す最短間隔（秒）
+SNAPSHOT_INTERVAL = 5.0
+
+
+def _key(name: str, labels: Dict[str, str]) -> Tuple:
+    return (name, tuple(sorted(labels.items())))
+
+
+class Metrics:
+    """
+    URL・ロゴ取得のカウンターとステージ別タイマー（プロセス全体で共有）
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        # キー -> [回数, 合計秒, 最大秒]
+        self._timers = {}
+        self._last_snapshot = 0.0
+
+    def incr(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            timer = self._timers.setdefault(key, [0, 0.0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> Dict:
+        """現在の値をコピーして返す"""
+        with self._lock:
+            counters = dict(self._counters)
+            timers = {key: list(value) for key, value in self._timers.items()}
+        return {"counters": counters, "timers": timers}
+
+    def rows(self):
+        """デバッグ表示用に (名前, ラベル, 値) の行を返す"""
+        snapshot = self.snapshot()
+        rows = []
+        for (name, labels), value in sorted(snapshot["counters"].items()):
+            rows.append({"metric": name, "labels": _format_labels(labels), "value": value})
+        for (name, labels), (count, total, maximum) in sorted(snapshot["timers"].items()):
+            rows.append({
+                "metric": name,
+                "labels": _format_labels(labels),
+                "value": f"n={count} avg={total / count * 1000:.1f}ms max={maximum * 1000:.1f}ms",
+            })
+        return rows
+
+    def to_prometheus(self) -> str:
+        """Prometheusのテキスト形式に変換する"""
+        snapshot = self.snapshot()
+        lines = []
+        for (name, labels), value in sorted(snapshot["counters"].items()):
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), (count, total, maximum) in sorted(snapshot["timers"].items()):
+            label_text = _format_labels(labels)
+            lines.append(f"{name}_count{label_text} {count}")
+            lines.append(f"{name}_sum{label_text} {total:.6f}")
+            lines.append(f"{name}_max{label_text} {maximum:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self, path: str = METRICS_FILE):
+        """スナップショットファイルを書き出す（一時ファイルから置き換えるので読み手は常に完全な内容を読む）"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+        self._last_snapshot = time.monotonic()
+
+    def maybe_write_snapshot(self, path: str = METRICS_FILE):
+        """前回からSNAPSHOT_INTERVAL秒以上経っていればスナップショットを書き出す"""
+        if time.monotonic() - self._last_snapshot >= SNAPSHOT_INTERVAL:
+            try:
+                self.write_snapshot(path)
+            except OSError:
+                pass
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+
+def _format_labels(labels: Tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+metrics = Metrics()
+
+
+def instrumented_request(stage: str, method: str, url: str, **kwargs) -> "requests.Response":
+    """
+    共有Sessionでリクエストを送り、ステージごとのプローブ数・所要時間・ステータス・タイムアウトを記録する
+    ホストごとの流量制限を守り、遮断中のホストには送らない（HostBlocked / RateLimited）
+    """
+    # requestsなどは画面の表示（メトリクスの表示）には不要なので、最初のリクエストのときに読み込む
+    import requests
+    from utils.host_guard import HostBlocked, RateLimited, get_host_guard
+    from utils.http_client import get_session
+
+    host = (urlsplit(url).hostname or "").lower()
+    guard = get_host_guard()
+    timeout = kwargs.get("timeout")
+    try:
+        # 枠が空くまで待つのはタイムアウトまで（接続・読み込みのタプルの場合は接続側）
+        guard.acquire(host, max_wait=(timeout[0] if isinstance(timeout, tuple) else timeout) or 0.0)
+    except HostBlocked:
+        metrics.incr("enrichment_probe_skipped_total", stage=stage, reason="circuit_open")
+        raise
+    except RateLimited:
+        metrics.incr("enrichment_probe_skipped_total", stage=stage, reason="rate_limited")
+        raise
+    metrics.incr("enrichment_probes_total", stage=stage)
+    started = time.perf_counter()
+    try:
+        response = get_session().request(method, url, **kwargs)
+    except requests.Timeout:
+        metrics.incr("enrichment_probe_timeouts_total", stage=stage)
+        guard.record_failure(host, reason="timeout")
+        raise
+    except requests.RequestException:
+        metrics.incr("enrichment_probe_errors_total", stage=stage)
+        guard.record_failure(host, reason="error")
+        raise
+    finally:
+        metrics.observe("enrichment_probe_seconds", time.perf_counter() - started, stage=stage)
+    metrics.incr("enrichment_probe_status_total", stage=stage, code=str(response.status_code))
+    guard.record_response(host, response)
+    return response
@@ -0,0 +1,117 @@
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Iterator, Optional
+
+
+class Status(Enum):
+    """案件のステータス（定義順が表示順）"""
+    INITIAL_CONTACT = "初期接触"
+    NEGOTIATING = "商談中"
+    ON_HOLD = "保留"
+    WON = "成約"
+    DECLINED = "見送り"
+
+
+_STATUS_BY_VALUE = {status.value: status for status in Status}
+
+
+def parse_timestamp(value) -> Optional[datetime]:
+    """ISO形式の日時をローカル時刻（タイムゾーンなし）に変換する（読めない場合はNone）"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+class Startup:
+    """
+    スタートアップ1件分のレコード
+    作成日時は読み込み時に1回だけ解析し、ステータスは Status で持つ
+    既存コードのため startup["status"] / startup.get("hp") のように辞書と同じ形でも読める（値はJSONと同じ形）
+    """
+
+    # JSONの項目（この順に書き出す）
+    FIELDS = (
+        "id", "company_name", "hp", "email", "status", "overview", "notes",
+        "logo_url", "logo_path", "enrichment_status", "created_at", "updated_at",
+    )
+    __slots__ = FIELDS + ("created", "extra")
+
+    def __init__(self, **fields):
+        # 元のJSONにない項目は未設定のままにする（書き出し時に項目を増やさない）
+        self.extra = {}
+        self.created = None
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Startup":
+        if isinstance(data, cls):
+            return data
+        return cls(**data)
+
+    def to_dict(self) -> Dict:
+        """保存・ログ用に元のJSONと同じ形の辞書に戻す"""
+        data = {key: self[key] for key in self.FIELDS if key in self}
+        data.update(self.extra)
+        return data
+
+    @property
+    def created_ts(self) -> Optional[float]:
+        return self.created.timestamp() if self.created is not None else None
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            try:
+                value = getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+            # ステータスは文字列で返す（未知のステータスは元の文字列のまま持っている）
+            return value.value if isinstance(value, Status) else value
+        return self.extra[key]
+
+    def __setitem__(self, key, value):
+        if key == "status":
+            value = _STATUS_BY_VALUE.get(value, value)
+        elif key == "created_at":
+            self.created = parse_timestamp(value)
+        if key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            self.extra[key] = value
+
+    def __contains__(self, key) -> bool:
+        if key in self.FIELDS:
+            return hasattr(self, key)
+        return key in self.extra
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.to_dict())
+
+    def __eq__(self, other):
+        if isinstance(other, Startup):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    __hash__ = None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def update(self, fields: Dict):
+        for key, value in fields.items():
+            self[key] = value
+
+    def __repr__(self):
+        return f"Startup({self.to_dict()!r})"
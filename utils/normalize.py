@@ -0,0 +1,65 @@
+import re
+import unicodedata
+from typing import Optional
+from urllib.parse import urlparse
+
+# 会社名の比較時に無視する法人格表記
+CORPORATE_SUFFIXES = re.compile(
+    r'(株式会社|有限会社|合同会社|合資会社|合名会社|\(株\)|（株）|㈱|'
+    r'\binc\b|\bltd\b|\bllc\b|\bcorp\b|\bcorporation\b|\bco\b|\bkk\b|\bk\.k\.)',
+    flags=re.IGNORECASE
+)
+
+# 国別ドメインで登録ドメインの1つ上に付く属性（co.jp, com.au, co.uk など）
+SECOND_LEVEL_LABELS = {"co", "ne", "or", "ac", "go", "ed", "gr", "lg", "ad", "com", "net", "org", "gov", "edu"}
+
+
+def normalize_company_name(company_name: str) -> str:
+    """
+    会社名を比較・キャッシュ用のキーに正規化する
+    （NFKC正規化、小文字化、法人格表記と記号・空白の除去）
+    """
+    if not company_name:
+        return ""
+    name = unicodedata.normalize('NFKC', company_name).lower()
+    name = CORPORATE_SUFFIXES.sub('', name)
+    return re.sub(r'[\s\W_]+', '', name)
+
+
+# カタカナ（ァ〜ヶ）-> 対応するひらがな
+_KANA_TABLE = {code: code - 0x60 for code in range(ord('ァ'), ord('ヶ') + 1)}
+
+
+def fold_kana(text: str) -> str:
+    """カタカナをひらがなに揃える"""
+    return text.translate(_KANA_TABLE)
+
+
+def normalize_for_search(text: str) -> str:
+    """
+    検索用に正規化する（会社名の正規化に加えてカタカナ・ひらがなを同一視）
+    """
+    return fold_kana(normalize_company_name(text))
+
+
+def registrable_domain(url: Optional[str]) -> str:
+    """
+    URLから登録ドメインを取り出す（https://www.example.co.jp/about -> example.co.jp）
+    取り出せない場合は空文字
+    """
+    if not url:
+        return ""
+    url = url.strip()
+    if "://" not in url:
+        url = "http://" + url
+    try:
+        host = urlparse(url).hostname or ""
+    except ValueError:
+        return ""
+    labels = [label for label in host.lower().rstrip(".").split(".") if label]
+    if len(labels) < 2:
+        return ""
+    # 国別ドメイン（2文字）で属性型の場合は3ラベル分を登録ドメインとする
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in SECOND_LEVEL_LABELS:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
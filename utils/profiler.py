@@ -0,0 +1,134 @@
+import os
+import sys
+import threading
+import time
+from importlib.abc import MetaPathFinder
+from typing import Dict, List, Optional
+
+# STARTUP_PROFILE=1 で起動すると、モジュールの読み込み時間と画面の区間ごとの描画時間を記録する
+PROFILE_ENABLED = os.environ.get("STARTUP_PROFILE", "") not in ("", "0")
+# 表示する読み込み時間の上位件数
+TOP_IMPORTS = 20
+
+
+class _ImportTimer(MetaPathFinder):
+    """
+    モジュールの実行（exec_module）にかかった時間を記録する
+    （時間は依存先の読み込みを含む累積値で、python -X importtime の cumulative に相当する）
+    """
+
+    def __init__(self, times: Dict[str, float]):
+        self._times = times
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path, target=None):
+        # 自分自身を除いた残りのファインダーに探させる
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.finding = False
+        loader = spec.loader
+        if loader is not None and hasattr(loader, "exec_module") and not getattr(loader, "_profiled", False):
+            spec.loader = _TimedLoader(loader, self._times)
+        return spec
+
+
+class _TimedLoader:
+    _profiled = True
+
+    def __init__(self, loader, times: Dict[str, float]):
+        self._loader = loader
+        self._times = times
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        started = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._times[module.__name__] = time.perf_counter() - started
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class StartupProfiler:
+    """
+    起動（最初の実行）と直近の実行について、区間ごとの描画時間を記録する
+    区間は mark() を呼んだ位置で区切る（前回の mark() からの経過時間）
+    """
+
+    def __init__(self, enabled: bool = PROFILE_ENABLED):
+        self.enabled = enabled
+        self.import_times: Dict[str, float] = {}
+        self.cold: Optional[List] = None
+        self.last: Optional[List] = None
+        self._run: Optional[List] = None
+        self._run_started = 0.0
+        self._checkpoint = 0.0
+        if enabled:
+            sys.meta_path.insert(0, _ImportTimer(self.import_times))
+
+    def start_run(self):
+        if not self.enabled:
+            return
+        self._run = []
+        self._run_started = self._checkpoint = time.perf_counter()
+
+    def mark(self, section: str):
+        """前回の区切りからここまでを section の時間として記録する"""
+        if not self.enabled or self._run is None:
+            return
+        now = time.perf_counter()
+        self._run.append((section, now - self._checkpoint))
+        self._checkpoint = now
+
+    def finish_run(self):
+        if not self.enabled or self._run is None:
+            return
+        self._run.append(("合計", time.perf_counter() - self._run_started))
+        self.last = self._run
+        self._run = None
+        if self.cold is None:
+            self.cold = self.last
+            # 起動時の結果はサーバーのログにも出す
+            print(self.report(), file=sys.stderr)
+
+    def rows(self) -> List[Dict]:
+        """区間ごとに起動時と直近の実行の時間（ミリ秒）を返す"""
+        if not self.cold:
+            return []
+        last = dict(self.last or [])
+        return [
+            {"section": section, "cold_ms": round(seconds * 1000, 1),
+             "last_ms": round(last.get(section, 0.0) * 1000, 1)}
+            for section, seconds in self.cold
+        ]
+
+    def import_rows(self, top: int = TOP_IMPORTS) -> List[Dict]:
+        """読み込みに時間がかかったモジュールの上位（依存先を含む累積時間）"""
+        slowest = sorted(self.import_times.items(), key=lambda item: item[1], reverse=True)[:top]
+        return [{"module": name, "ms": round(seconds * 1000, 1)} for name, seconds in slowest]
+
+    def report(self) -> str:
+        """サーバーのログ向けの文字列"""
+        lines = ["[startup profile] sections (cold / last ms):"]
+        lines += [f"  {row['section']:<24} {row['cold_ms']:>9.1f} {row['last_ms']:>9.1f}" for row in self.rows()]
+        lines.append("[startup profile] slowest imports (cumulative ms):")
+        lines += [f"  {row['module']:<40} {row['ms']:>9.1f}" for row in self.import_rows()]
+        return "\n".join(lines)
+
+
+profiler = StartupProfiler()
@@ -0,0 +1,222 @@
+"""
+登録済みのスタートアップのHP・ロゴをまとめて取得し直すコマンド（Streamlitなしで動く）
+
+取得の手法を改善した後などに、全件（または指定したステータスの案件）を取得し直す。
+結果は BATCH_SIZE 件ごとにまとめて書き戻し、書き戻したIDをチェックポイントに追記するので、
+途中で止まった場合も同じコマンドを再実行すれば続きから再開する。
+
+使い方（リポジトリの直下で実行する）:
+    python -m utils.reenrich
+    python -m utils.reenrich --status 初期接触 --status 商談中 --workers 8
+    python -m utils.reenrich --processes 4 --refresh-cache
+    python -m utils.reenrich --restart          # チェックポイントを捨てて最初から
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set
+
+from utils.activity_log import append_log
+from utils.data_manager import iter_startups, patch_startups
+from utils.enrichment import ENRICHMENT_FAILED, resolve_enrichment
+from utils.views import STATUSES
+
+CHECKPOINT_FILE = "data/reenrich_checkpoint.jsonl"
+# 何件ごとに書き戻してチェックポイントを進めるか
+BATCH_SIZE = 50
+# 既定の同時実行数
+WORKERS = 4
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointError(Exception):
+    """既存のチェックポイントと今回の指定が食い違っている"""
+
+
+class Checkpoint:
+    """
+    1行目に実行条件、2行目以降に書き戻し済みのIDを追記するファイル
+    （書き戻しが終わってから追記するので、チェックポイントが書き込みより先に進むことはない）
+    """
+
+    def __init__(self, path: str, options: Dict):
+        self.path = path
+        self.options = options
+        self.done: Set[str] = set()
+
+    def open(self, restart: bool = False) -> int:
+        """既存のチェックポイントを読み込み（restart=Trueなら捨てて）、処理済みの件数を返す"""
+        if restart and os.path.exists(self.path):
+            os.remove(self.path)
+        if not os.path.exists(self.path):
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({"options": self.options, "started_at": datetime.now().isoformat()},
+                                   ensure_ascii=False) + "\n")
+            return 0
+        with open(self.path, 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            if header.get("options") != self.options:
+                raise CheckpointError(
+                    f"前回の実行（{header.get('options')}）のチェックポイントが残っています。"
+                    "続きから再開する場合は同じ指定で、最初からやり直す場合は --restart を付けて実行してください"
+                )
+            for line in f:
+                try:
+                    self.done.update(json.loads(line)["ids"])
+                except (ValueError, KeyError):
+                    # 書き込み途中で止まった最後の行
+                    continue
+        return len(self.done)
+
+    def commit(self, ids: List[str]):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({"ids": ids}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.update(ids)
+
+    def finish(self):
+        """全件が終わったらチェックポイントを消す（次回は最初から）"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def resolve_one(startup_id: str, company_name: str, hp_url: Optional[str] = None,
+                refresh_cache: bool = False) -> Dict:
+    """
+    1件分を取得して {"id", "fields"（保存する項目）} を返す（プロセスプールに渡すのでモジュールの関数にしておく）
+    refresh_cache=True の場合は取得の前にその会社のキャッシュを消す
+    （キャッシュのSQLite接続はfork先に引き継げないので、親プロセスでは開かずにワーカー側で消す）
+    """
+    try:
+        if refresh_cache:
+            from utils.resolution_cache import get_cache
+            get_cache().invalidate(company_name)
+        fields = resolve_enrichment(company_name, hp_url)
+    except Exception as e:
+        fields = {"enrichment_status": ENRICHMENT_FAILED, "enrichment_error": str(e)}
+    return {"id": startup_id, "fields": fields}
+
+
+def _targets(statuses: Optional[List[str]], done: Set[str]) -> Iterator[Dict]:
+    for batch in iter_startups(statuses):
+        for startup in batch:
+            if startup["id"] not in done and startup.get("company_name"):
+                yield startup
+
+
+def run(statuses: Optional[List[str]] = None, workers: int = WORKERS, processes: bool = False,
+        keep_hp: bool = False, refresh_cache: bool = False, batch_size: int = BATCH_SIZE,
+        restart: bool = False, limit: Optional[int] = None, checkpoint_path: str = CHECKPOINT_FILE) -> Dict:
+    """
+    対象のレコードを取得し直して書き戻し、件数を返す
+    中断（Ctrl+C）された場合も、それまでに取得できた分は書き戻してから終了する
+    """
+    options = {"statuses": statuses, "keep_hp": keep_hp, "refresh_cache": refresh_cache}
+    checkpoint = Checkpoint(checkpoint_path, options)
+    resumed = checkpoint.open(restart)
+    if resumed:
+        logger.info("チェックポイントから再開します（処理済み %d件）", resumed)
+
+    result = {"resumed": resumed, "done": 0, "failed": 0, "written": 0, "interrupted": False}
+    pending: List[Dict] = []
+
+    def flush():
+        if not pending:
+            return
+        # 1回のトランザクションで書き戻す（削除済みのレコードは無視される）
+        result["written"] += patch_startups({item["id"]: item["fields"] for item in pending})
+        checkpoint.commit([item["id"] for item in pending])
+        pending.clear()
+
+    executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    started = time.perf_counter()
+    targets = _targets(statuses, checkpoint.done)
+    submitted = 0
+    with executor_class(max_workers=workers) as executor:
+        futures = set()
+        try:
+            while True:
+                # 全件を一度に投入せず、同時実行数の数倍だけ先に投入しておく
+                while len(futures) < workers * 4 and (limit is None or submitted < limit):
+                    startup = next(targets, None)
+                    if startup is None:
+                        break
+                    hp_url = startup.get("hp") if keep_hp else None
+                    futures.add(executor.submit(resolve_one, startup["id"], startup["company_name"], hp_url,
+                                                refresh_cache))
+                    submitted += 1
+                if not futures:
+                    break
+                finished, futures = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    item = future.result()
+                    pending.append(item)
+                    result["done"] += 1
+                    if item["fields"].get("enrichment_status") == ENRICHMENT_FAILED:
+                        result["failed"] += 1
+                if len(pending) >= batch_size:
+                    flush()
+                    elapsed = time.perf_counter() - started
+                    logger.info("%d件完了（失敗 %d件、%.1f件/秒）",
+                                result["done"], result["failed"], result["done"] / elapsed if elapsed else 0.0)
+        except KeyboardInterrupt:
+            result["interrupted"] = True
+            logger.warning("中断しました。取得済みの分を書き戻して終了します（再実行すると続きから再開します）")
+            for future in futures:
+                future.cancel()
+            for future in futures:
+                if not future.cancelled():
+                    try:
+                        pending.append(future.result())
+                        result["done"] += 1
+                    except Exception:
+                        pass
+        finally:
+            flush()
+
+    if not result["interrupted"] and (limit is None or submitted < limit):
+        checkpoint.finish()
+    append_log({
+        "timestamp": datetime.now().isoformat(),
+        "action": "reenrich_startups",
+        "data": dict(result, statuses=statuses, keep_hp=keep_hp),
+    })
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="登録済みのスタートアップのHP・ロゴを取得し直す")
+    parser.add_argument("--status", action="append", choices=STATUSES, dest="statuses",
+                        help="対象のステータス（複数指定可、省略時は全件）")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="同時に取得する件数")
+    parser.add_argument("--processes", action="store_true",
+                        help="スレッドではなくプロセスで並列化する（流量制限はプロセスごとにかかる）")
+    parser.add_argument("--keep-hp", action="store_true", help="保存済みのHPは取得し直さない（ロゴだけ取得する）")
+    parser.add_argument("--refresh-cache", action="store_true", help="会社ごとの取得結果のキャッシュを消してから取得する")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="何件ごとに書き戻すか")
+    parser.add_argument("--limit", type=int, default=None, help="今回処理する最大件数（続きは次回の実行で再開する）")
+    parser.add_argument("--restart", action="store_true", help="チェックポイントを捨てて最初からやり直す")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="チェックポイントのパス")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        result = run(args.statuses, args.workers, args.processes, args.keep_hp, args.refresh_cache,
+                     args.batch_size, args.restart, args.limit, args.checkpoint)
+    except CheckpointError as e:
+        logger.error("%s", e)
+        return 2
+    logger.info("完了: %s", result)
+    return 1 if result["interrupted"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
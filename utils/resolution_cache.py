@@ -0,0 +1,255 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from utils.normalize import normalize_company_name
+
+CACHE_FILE = "data/resolution_cache.db"
+
+# 取得成功の保持期間（秒）
+POSITIVE_TTL = 30 * 24 * 3600
+# 「見つからなかった」結果の保持期間（秒）
+NEGATIVE_TTL = 24 * 3600
+# 個別プローブ結果の保持期間（秒）
+PROBE_TTL = 24 * 3600
+# ディスク上に保持する最大件数（超えたら最終アクセスが古い順に削除）
+MAX_ENTRIES = 10000
+MAX_PROBES = 100000
+# プロセス内のメモリキャッシュ件数
+MEMORY_ENTRIES = 2048
+
+MISS = object()
+
+
+class ResolutionCache:
+    """
+    URL・ロゴ取得結果のディスクキャッシュ（SQLite + メモリLRU）
+    """
+
+    def __init__(self, path: str = CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._memory = OrderedDict()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " kind TEXT NOT NULL, key TEXT NOT NULL, value TEXT,"
+                " expires_at REAL NOT NULL, accessed_at REAL NOT NULL,"
+                " PRIMARY KEY (kind, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_accessed ON results(accessed_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS probes ("
+                " url TEXT PRIMARY KEY, result TEXT, expires_at REAL NOT NULL, company TEXT)"
+            )
+            # 会社名の列がない古いキャッシュファイルには列を足す
+            if "company" not in {row[1] for row in conn.execute("PRAGMA table_info(probes)")}:
+                conn.execute("ALTER TABLE probes ADD COLUMN company TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_probes_expires ON probes(expires_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_probes_company ON probes(company)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS strategy_stats ("
+                " scope TEXT NOT NULL, name TEXT NOT NULL,"
+                " attempts INTEGER NOT NULL DEFAULT 0, wins INTEGER NOT NULL DEFAULT 0,"
+                " PRIMARY KEY (scope, name))"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, memory_key, value, expires_at):
+        self._memory[memory_key] = (value, expires_at)
+        self._memory.move_to_end(memory_key)
+        while len(self._memory) > MEMORY_ENTRIES:
+            self._memory.popitem(last=False)
+
+    def get(self, kind: str, company_name: str):
+        """
+        キャッシュ済みの結果を返す（未登録・期限切れの場合はMISS、否定結果はNone）
+        """
+        key = normalize_company_name(company_name)
+        if not key:
+            return MISS
+        memory_key = (kind, key)
+        now = time.time()
+
+        with self._lock:
+            cached = self._memory.get(memory_key)
+            if cached is not None:
+                value, expires_at = cached
+                if expires_at > now:
+                    self._memory.move_to_end(memory_key)
+                    return value
+                self._memory.pop(memory_key, None)
+
+            try:
+                row = self._connect().execute(
+                    "SELECT value, expires_at FROM results WHERE kind = ? AND key = ?",
+                    (kind, key)
+                ).fetchone()
+                if row is None or row[1] <= now:
+                    return MISS
+                self._conn.execute(
+                    "UPDATE results SET accessed_at = ? WHERE kind = ? AND key = ?",
+                    (now, kind, key)
+                )
+            except sqlite3.Error:
+                return MISS
+            self._remember(memory_key, row[0], row[1])
+        return row[0]
+
+    def set(self, kind: str, company_name: str, value: Optional[str]):
+        """
+        結果を保存する（Noneは否定結果として短いTTLで保存）
+        """
+        key = normalize_company_name(company_name)
+        if not key:
+            return
+        now = time.time()
+        expires_at = now + (POSITIVE_TTL if value else NEGATIVE_TTL)
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (kind, key, value, expires_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (kind, key, value, expires_at, now)
+                )
+                self._evict(conn)
+            except sqlite3.Error:
+                pass
+            self._remember((kind, key), value, expires_at)
+
+    def get_probe(self, url: str) -> Tuple[bool, Optional[str]]:
+        """
+        個別プローブの結果を返す（(ヒットしたか, 結果)）
+        """
+        with self._lock:
+            try:
+                row = self._connect().execute(
+                    "SELECT result, expires_at FROM probes WHERE url = ?", (url,)
+                ).fetchone()
+            except sqlite3.Error:
+                return False, None
+        if row is None or row[1] <= time.time():
+            return False, None
+        return True, row[0]
+
+    def set_probe(self, url: str, result: Optional[str], company_name: Optional[str] = None):
+        """
+        個別プローブの結果を保存する
+        （company_nameを渡すと、invalidate(company_name) でその会社の候補のプローブ結果も削除される）
+        """
+        company = normalize_company_name(company_name) if company_name else None
+        with self._lock:
+            try:
+                self._connect().execute(
+                    "INSERT OR REPLACE INTO probes (url, result, expires_at, company) VALUES (?, ?, ?, ?)",
+                    (url, result, time.time() + PROBE_TTL, company)
+                )
+            except sqlite3.Error:
+                pass
+
+    def record_outcome(self, scope: str, attempted: List[str], winner: Optional[str] = None):
+        """
+        戦略・パターンの試行回数と成功回数を記録する（並び替えの統計に使う）
+        """
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.executemany(
+                    "INSERT INTO strategy_stats (scope, name, attempts, wins) VALUES (?, ?, 1, ?)"
+                    " ON CONFLICT(scope, name) DO UPDATE SET"
+                    " attempts = attempts + 1, wins = wins + excluded.wins",
+                    [(scope, name, 1 if name == winner else 0) for name in attempted]
+                )
+            except sqlite3.Error:
+                pass
+
+    def outcome_stats(self, scope: str) -> Dict[str, Tuple[int, int]]:
+        """戦略・パターンごとの (試行回数, 成功回数) を返す"""
+        with self._lock:
+            try:
+                rows = self._connect().execute(
+                    "SELECT name, attempts, wins FROM strategy_stats WHERE scope = ?", (scope,)
+                ).fetchall()
+            except sqlite3.Error:
+                return {}
+        return {name: (attempts, wins) for name, attempts, wins in rows}
+
+    def _evict(self, conn):
+        # 件数上限を超えた分を最終アクセスが古い順に削除する
+        count = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        if count > MAX_ENTRIES:
+            conn.execute(
+                "DELETE FROM results WHERE rowid IN ("
+                " SELECT rowid FROM results ORDER BY accessed_at LIMIT ?)",
+                (count - MAX_ENTRIES,)
+            )
+        conn.execute("DELETE FROM probes WHERE expires_at <= ?", (time.time(),))
+        count = conn.execute("SELECT COUNT(*) FROM probes").fetchone()[0]
+        if count > MAX_PROBES:
+            conn.execute(
+                "DELETE FROM probes WHERE rowid IN ("
+                " SELECT rowid FROM probes ORDER BY expires_at LIMIT ?)",
+                (count - MAX_PROBES,)
+            )
+
+    def invalidate(self, company_name: Optional[str] = None):
+        """
+        指定した会社のキャッシュを削除する（会社名を省略した場合は全削除）
+        会社を指定した場合は、その会社の探索で記録した候補ごとのプローブ結果も削除する
+        """
+        with self._lock:
+            try:
+                conn = self._connect()
+                if company_name is None:
+                    conn.execute("DELETE FROM results")
+                    conn.execute("DELETE FROM probes")
+                    conn.execute("DELETE FROM strategy_stats")
+                    self._memory.clear()
+                else:
+                    key = normalize_company_name(company_name)
+                    conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                    conn.execute("DELETE FROM probes WHERE company = ?", (key,))
+                    for memory_key in [k for k in self._memory if k[1] == key]:
+                        self._memory.pop(memory_key, None)
+            except sqlite3.Error:
+                pass
+
+    def stats(self) -> dict:
+        """デバッグ表示用の件数を返す"""
+        with self._lock:
+            try:
+                conn = self._connect()
+                results = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+                negatives = conn.execute("SELECT COUNT(*) FROM results WHERE value IS NULL").fetchone()[0]
+                probes = conn.execute("SELECT COUNT(*) FROM probes").fetchone()[0]
+            except sqlite3.Error:
+                return {}
+        return {"results": results, "negative": negatives, "probes": probes, "memory": len(self._memory)}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResolutionCache:
+    """プロセス全体で共有するキャッシュを返す"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResolutionCache()
+    return _cache
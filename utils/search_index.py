@@ -0,0 +1,161 @@
+from itertools import islice
+from typing import Dict, List, Optional, Set, Tuple
+
+from utils.normalize import normalize_for_search
+
+# 索引に使うN-gramの最大長（短い検索語はその長さのN-gramで完全一致検索する）
+GRAM_SIZE = 3
+# 索引を作るN-gramの最小長（これより短い検索語は索引を使わずに全件の名前を部分一致で走査する）
+MIN_GRAM_SIZE = 2
+# 関連度を計算する候補の上限（超えた場合は登録の新しい順にこの件数までを候補とし、打ち切ったことを返す）
+MAX_CANDIDATES = 2000
+
+
+def _grams(text: str, size: int) -> List[str]:
+    return [text[i:i + size] for i in range(len(text) - size + 1)]
+
+
+class SearchIndex:
+    """
+    会社名のN-gram索引（NFKC正規化・法人格除去・カナ同一視した名前で検索する）
+    """
+
+    def __init__(self):
+        # n -> {N-gram -> {レコードID}}（1文字の索引はほぼ全件を含んで大きいだけなので作らない）
+        self._postings: Dict[int, Dict[str, set]] = {n: {} for n in range(MIN_GRAM_SIZE, GRAM_SIZE + 1)}
+        # どちらも登録順（更新しても並び順は変えない）。候補を打ち切るときは新しい順に採用する
+        self._names: Dict[str, str] = {}
+        self._records: Dict[str, Dict] = {}
+        # レコードID -> ステータス（候補の走査中にステータスで絞り込む用）
+        self._status: Dict[str, str] = {}
+
+    def __len__(self):
+        return len(self._records)
+
+    def _index(self, startup_id: str, name: str):
+        for n, postings in self._postings.items():
+            for gram in set(_grams(name, n)):
+                ids = postings.get(gram)
+                if ids is None:
+                    postings[gram] = {startup_id}
+                else:
+                    ids.add(startup_id)
+
+    def _unindex(self, startup_id: str, name: str):
+        for n, postings in self._postings.items():
+            for gram in set(_grams(name, n)):
+                ids = postings.get(gram)
+                if ids is not None:
+                    ids.discard(startup_id)
+                    if not ids:
+                        del postings[gram]
+
+    def add(self, startup: Dict):
+        startup_id = startup["id"]
+        name = normalize_for_search(startup.get("company_name", ""))
+        previous = self._names.get(startup_id)
+        if previous is not None and previous != name:
+            self._unindex(startup_id, previous)
+        # 既にあるIDは同じ位置のまま置き換える
+        self._names[startup_id] = name
+        self._records[startup_id] = startup
+        self._status[startup_id] = startup["status"]
+        if previous != name:
+            self._index(startup_id, name)
+
+    def remove(self, startup: Dict):
+        startup_id = startup["id"]
+        name = self._names.pop(startup_id, None)
+        if name is None:
+            return
+        del self._records[startup_id]
+        del self._status[startup_id]
+        self._unindex(startup_id, name)
+
+    def _newest(self, ids: Set[str], skip: Set[str], statuses: Optional[Set[str]], room: int) -> List[str]:
+        """idsのうちskipになく、statusesに含まれるものを登録の新しい順にroom件まで返す（一致が多いほど早く打ち切れる）"""
+        status = self._status
+        if statuses is None:
+            matches = (i for i in reversed(self._records) if i in ids and i not in skip)
+        else:
+            matches = (i for i in reversed(self._records) if i in ids and i not in skip and status[i] in statuses)
+        return list(islice(matches, room))
+
+    def _collect(self, postings: List[set], statuses: Optional[Set[str]]) -> Tuple[List[str], bool]:
+        """
+        postingsのどれかに含まれ、statusesに当てはまるIDを返す（(ID, 候補を打ち切ったか)）
+        件数の少ないpostingsから順に集め、MAX_CANDIDATES件を超える分は登録の新しい順に採用する
+        """
+        status = self._status
+        candidates: List[str] = []
+        seen: Set[str] = set()
+        for ids in postings:
+            room = MAX_CANDIDATES - len(candidates)
+            if len(ids) > room:
+                picked = self._newest(ids, seen, statuses, room + 1)
+                candidates.extend(picked[:room])
+                if len(picked) > room:
+                    return candidates, True
+            else:
+                picked = [i for i in ids if i not in seen and (statuses is None or status[i] in statuses)]
+                candidates.extend(picked)
+            seen.update(picked)
+        return candidates, False
+
+    def search(self, query: str, statuses: Optional[List[str]] = None,
+               limit: Optional[int] = None) -> Tuple[List[Dict], bool]:
+        """
+        会社名を曖昧検索し、(関連度の高い順のレコード, 候補を打ち切ったか) を返す
+        一致する候補がMAX_CANDIDATES件を超えた場合は、登録の新しい順にMAX_CANDIDATES件までを対象にする
+        """
+        query = normalize_for_search(query)
+        if not query:
+            # 法人格だけの検索語などは絞り込まない
+            records = list(self._records.values())
+            if statuses is not None:
+                records = [r for r in records if r["status"] in statuses]
+            return (records[:limit] if limit is not None else records), False
+
+        if statuses is not None:
+            statuses = set(statuses)
+
+        if len(query) < MIN_GRAM_SIZE:
+            # 1文字の検索語は名前を新しい順に走査して部分一致を探す
+            status = self._status
+            matches = (i for i, name in reversed(self._names.items())
+                       if query in name and (statuses is None or status[i] in statuses))
+            ids = list(islice(matches, MAX_CANDIDATES + 1))
+            truncated = len(ids) > MAX_CANDIDATES
+            ids = ids[:MAX_CANDIDATES]
+            scored = [(1.0 + len(query) / max(len(self._names[i]), 1), i) for i in ids]
+        elif len(query) <= GRAM_SIZE:
+            # 短い検索語は同じ長さのN-gramを含む名前（＝部分一致）をそのまま返す
+            ids, truncated = self._collect([self._postings[len(query)].get(query, set())], statuses)
+            scored = [(1.0 + len(query) / max(len(self._names[i]), 1), i) for i in ids]
+        else:
+            postings = self._postings[GRAM_SIZE]
+            # 件数の少ないN-gramから順に並べる
+            query_grams = sorted(set(_grams(query, GRAM_SIZE)), key=lambda gram: len(postings.get(gram, ())))
+            # 検索語のトライグラムの半分以上を含むものを候補とする
+            threshold = max(1, (len(query_grams) + 1) // 2)
+            # 閾値以上のN-gramを含む名前は、件数の少ない方から (N-gram数 - 閾値 + 1) 個のどれかを必ず含むので、
+            # 候補はそれらの索引からだけ集める（よくあるN-gramの大きな索引は候補の判定にしか使わない）
+            candidates, truncated = self._collect(
+                [postings.get(gram, set()) for gram in query_grams[:len(query_grams) - threshold + 1]], statuses)
+            scored = []
+            for startup_id in candidates:
+                shared = sum(1 for gram in query_grams if startup_id in postings.get(gram, ()))
+                if shared < threshold:
+                    continue
+                name = self._names[startup_id]
+                name_grams = max(len(name) - GRAM_SIZE + 1, 1)
+                score = shared / (len(query_grams) + name_grams - shared)
+                if query in name:
+                    score += 1.0
+                scored.append((score, startup_id))
+
+        # 関連度が同じ場合はIDの順（実行ごとに順序が変わらないようにする）
+        records = [self._records[i] for _, i in sorted(scored, key=lambda x: (-x[0], x[1]))]
+        if limit is not None:
+            records = records[:limit]
+        return records, truncated
@@ -0,0 +1,126 @@
+import html
+import os
+import re
+import threading
+from html.parser import HTMLParser
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import unquote
+
+# 1回の走査で <a> の href だけを取り出す
+# スクリプト・スタイル・コメントはまとめて読み飛ばす（中の文字列をリンクと取り違えない）
+# （終了タグまでは "<" 以外をまとめて読み進める形にして、1文字ずつのバックトラックを避ける）
+_TOKEN_PATTERN = re.compile(
+    r'<(?:'
+    r'script\b[^<]*(?:<(?!/script)[^<]*)*'
+    r'|style\b[^<]*(?:<(?!/style)[^<]*)*'
+    r'|!--[^-]*(?:-(?!->)[^-]*)*'
+    r'|a\s(?:[^>]*?\s)?href\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))'
+    r')',
+    flags=re.IGNORECASE
+)
+
+
+def tokenizer_links(text: str) -> List[str]:
+    """正規表現のトークナイザでリンクを取り出す（木を作らない・既定）"""
+    links = []
+    for match in _TOKEN_PATTERN.finditer(text):
+        href = match.group(1)
+        if href is None:
+            href = match.group(2)
+            if href is None:
+                href = match.group(3)
+                if href is None:
+                    continue
+        links.append(html.unescape(href) if '&' in href else href)
+    return links
+
+
+class _AnchorParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            for name, value in attrs:
+                if name == 'href' and value is not None:
+                    self.links.append(value)
+                    break
+
+
+def htmlparser_links(text: str) -> List[str]:
+    """標準ライブラリの HTMLParser でリンクを取り出す（開始タグだけを処理する）"""
+    parser = _AnchorParser()
+    parser.feed(text)
+    parser.close()
+    return parser.links
+
+
+def strainer_links(text: str) -> List[str]:
+    """BeautifulSoup の SoupStrainer で <a> だけを木にして取り出す"""
+    # 比較用のパーサーなので、使うときだけ bs4 を読み込む
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    soup = BeautifulSoup(text, 'html.parser', parse_only=SoupStrainer('a', href=True))
+    return [link['href'] for link in soup.find_all('a', href=True)]
+
+
+PARSERS: Dict[str, Callable[[str], List[str]]] = {
+    "tokenizer": tokenizer_links,
+    "htmlparser": htmlparser_links,
+    "strainer": strainer_links,
+}
+DEFAULT_PARSER = os.environ.get("SERP_PARSER", "tokenizer")
+
+_parser = PARSERS.get(DEFAULT_PARSER, tokenizer_links)
+_parser_lock = threading.Lock()
+
+
+def set_parser(name: str):
+    """
+    リンクの取り出し方を差し替える（ベンチマークで比較する場合など）
+    """
+    global _parser
+    if name not in PARSERS:
+        raise ValueError(f"未知のパーサーです: {name}（{', '.join(PARSERS)}）")
+    with _parser_lock:
+        _parser = PARSERS[name]
+
+
+def extract_links(text: str) -> List[str]:
+    """検索結果ページから <a> の href を出現順に返す"""
+    return _parser(text)
+
+
+def _unique(urls: Iterable[str]) -> List[str]:
+    seen = set()
+    result = []
+    for url in urls:
+        if url not in seen:
+            seen.add(url)
+            result.append(url)
+    return result
+
+
+def google_result_url(href: str) -> Optional[str]:
+    """Googleの結果リンク（/url?q=...）を実際のURLに戻す（結果でないリンクはNone）"""
+    if '/url?q=' in href:
+        return unquote(href.split('/url?q=', 1)[1].split('&', 1)[0]) or None
+    if href.startswith('http'):
+        return href
+    return None
+
+
+def google_candidates(text: str, score: Callable[[str], float]) -> List[str]:
+    """
+    Google検索結果ページから重複を除いた候補URLを score の高い順に返す
+    （スコアはURLごとに1回だけ計算し、同点は出現順）
+    """
+    urls = _unique(url for url in map(google_result_url, extract_links(text)) if url)
+    scored = sorted(enumerate(urls), key=lambda item: (-score(item[1]), item[0]))
+    return [url for _, url in scored]
+
+
+def yahoo_candidates(text: str) -> List[str]:
+    """Yahoo!検索結果ページから重複を除いた外部リンクを出現順に返す"""
+    return _unique(href for href in extract_links(text) if href.startswith('http'))
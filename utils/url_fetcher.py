@@ -1,22 +1,195 @@
 import requests
-import streamlit as st
-from urllib.parse import quote, unquote
+from urllib.parse import quote, urlsplit
+from concurrent.futures import wait
 import time
-from bs4 import BeautifulSoup
 import re
-import json
+import threading
+from utils.http_client import get_executor, race
+from utils.metrics import metrics, instrumented_request
+from utils.resolution_cache import get_cache, MISS
+from utils.dns_resolver import get_dns_cache, RESOLVE_TIMEOUT
+from utils.serp_parser import google_candidates, yahoo_candidates
+from utils.host_guard import HostBlocked, RateLimited, get_host_guard, looks_blocked, raise_if_blocked
 
-def fetch_company_url(company_name):
+# fetch_company_url 全体の既定の制限時間（秒）
+DEFAULT_DEADLINE = 5.0
+# 後に控えている戦略ごとに残しておく最低限の時間（秒）
+MIN_STRATEGY_BUDGET = 0.5
+# 結果のキャッシュへの書き込みなど、探索の後の処理のために制限時間から差し引いておく時間（秒）
+DEADLINE_MARGIN = 0.05
+# 成功率で並び替えるのに必要な最低試行回数
+MIN_SAMPLES = 20
+
+# ドメイン推測で試すパターン（{name}はクリーニング後の会社名）
+DOMAIN_PATTERNS = [
+    "{name}.com",
+    "{name}.co.jp",
+    "{name}.jp",
+    "{name}.net",
+    "{name}.org",
+    "{name}.info",
+    "{name}.biz",
+    "{name}-corp.com",
+    "{name}corp.com",
+    "www.{name}.com",
+]
+
+# Google検索時に送るヘッダー
+GOOGLE_HOST = "www.google.com"
+YAHOO_HOST = "search.yahoo.co.jp"
+
+GOOGLE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'ja,en-US;q=0.7,en;q=0.3',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+YAHOO_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+def _cached(probe, company_name):
+    """
+    プローブ結果をキャッシュ経由で参照するラッパーを返す
+    キャッシュするのはHTTPのステータスで判定できた結果だけで、タイムアウトや接続エラーは記録しない
+    （流量制限・遮断で確認できなかった場合はそのまま送出する）
+    結果は company_name に紐づけて保存し、その会社のキャッシュを削除するときに一緒に消す
+    """
+    def cached_probe(url, cancel_event):
+        cache = get_cache()
+        cache_key = f"{probe.__name__} {url}"
+        hit, result = cache.get_probe(cache_key)
+        if hit:
+            return result
+        try:
+            result = probe(url, cancel_event)
+        except (HostBlocked, RateLimited):
+            raise
+        except Exception:
+            # 一時的な失敗の可能性があるので、次回はもう一度確認する
+            return None
+        # 勝者確定後に打ち切られたプローブの結果は記録しない
+        if not cancel_event.is_set():
+            cache.set_probe(cache_key, result, company_name)
+        return result
+    return cached_probe
+
+def _probe_head_ok(url, cancel_event):
+    """HEADで200が返ればリダイレクト後のURLを返す"""
+    response = instrumented_request("domain_guess", "HEAD", url, timeout=3, allow_redirects=True)
+    raise_if_blocked(urlsplit(url).hostname, response)
+    if response.status_code == 200:
+        return response.url
+    return None
+
+def _probe_head_lenient(url, cancel_event):
+    """HEADで200/301/302が返ればリダイレクト後のURLを返す"""
+    response = instrumented_request("fallback", "HEAD", url, timeout=2, allow_redirects=True)
+    raise_if_blocked(urlsplit(url).hostname, response)
+    if response.status_code in [200, 301, 302]:
+        return response.url
+    return None
+
+def _probe_validate(url, cancel_event):
+    """HEADで200/301/302が返ればそのURLを返す（validate_url_quickと同じ判定）"""
+    response = instrumented_request("validate", "HEAD", url, timeout=3, allow_redirects=True)
+    raise_if_blocked(urlsplit(url).hostname, response)
+    if response.status_code in [200, 301, 302]:
+        return url
+    return None
+
+def _search_google(search_query, original_name, timeout=8):
+    """
+    Google検索結果から候補URLを品質順に返す
+    （流量制限・遮断・CAPTCHAページは「結果なし」と区別するため HostBlocked / RateLimited を送出する）
+    """
+    try:
+        encoded_query = quote(search_query)
+        search_url = f"https://{GOOGLE_HOST}/search?q={encoded_query}&num=10"
+        
+        response = instrumented_request("google", "GET", search_url, headers=GOOGLE_HEADERS, timeout=timeout)
+        raise_if_blocked(GOOGLE_HOST, response)
+        if response.status_code != 200:
+            return []
+        if looks_blocked(response.text):
+            get_host_guard().record_block(GOOGLE_HOST, reason="captcha")
+            raise HostBlocked(f"{GOOGLE_HOST} に遮断されました（captcha）")
+        # ページ全体の木は作らず、リンクだけを1回の走査で取り出す
+        with metrics.timer("serp_parse_seconds", engine="google"):
+            return google_candidates(response.text, lambda url: score_url_quality(url, original_name))
+    except (HostBlocked, RateLimited):
+        raise
+    except Exception:
+        return []
+
+def _search_yahoo(original_name, timeout=6):
+    """
+    Yahoo!検索結果から外部リンクを出現順に返す
+    （流量制限・遮断・CAPTCHAページは _search_google と同様に送出する）
+    """
+    try:
+        search_query = f"{original_name} 公式サイト"
+        encoded_query = quote(search_query)
+        yahoo_url = f"https://{YAHOO_HOST}/search?p={encoded_query}"
+        
+        response = instrumented_request("yahoo", "GET", yahoo_url, headers=YAHOO_HEADERS, timeout=timeout)
+        raise_if_blocked(YAHOO_HOST, response)
+        if response.status_code != 200:
+            return []
+        if looks_blocked(response.text):
+            get_host_guard().record_block(YAHOO_HOST, reason="captcha")
+            raise HostBlocked(f"{YAHOO_HOST} に遮断されました（captcha）")
+        with metrics.timer("serp_parse_seconds", engine="yahoo"):
+            return yahoo_candidates(response.text)
+    except (HostBlocked, RateLimited):
+        raise
+    except Exception:
+        return []
+
+def _dedupe(urls):
+    """順序を保ったまま重複を除く"""
+    seen = set()
+    result = []
+    for url in urls:
+        if url not in seen:
+            seen.add(url)
+            result.append(url)
+    return result
+
+def fetch_company_url(company_name, deadline=DEFAULT_DEADLINE):
     """
     会社名から公式HPのURLを取得する
     複数の検索手法を試行し、最初に成功したものを返す
+    （結果は見つからなかった場合も含めてキャッシュする。ただし遮断・時間切れで確認できなかった
+    候補がある場合は、次回に取り直すためキャッシュしない。自前の流量制限で送らなかったリクエストは
+    「結果なし」として扱い、キャッシュを妨げない）
+    deadlineは全体の制限時間（秒）で、残り時間を順に各戦略に割り当てる
     """
     
     if not company_name or company_name.strip() == "":
         return None
     
-    # より柔軟な会社名のクリーニング
-    original_name = company_name.strip()
+    cache = get_cache()
+    cached = cache.get("url", company_name)
+    if cached is not MISS:
+        metrics.incr("url_lookups_total", result="cached")
+        return cached
+    
+    with metrics.timer("url_lookup_seconds"):
+        url, complete = _resolve_company_url(company_name, deadline)
+    metrics.incr("url_lookups_total", result=("found" if url else "not_found") if complete else "incomplete")
+    metrics.maybe_write_snapshot()
+    if complete:
+        cache.set("url", company_name, url)
+    return url
+
+def _domain_guess_candidates(original_name):
+    """
+    1. 拡張されたドメイン推測（複数のクリーニングパターンを使用）の候補
+    (URL, ドメインパターン) のリストを返す
+    """
     clean_patterns = [
         # 元の名前そのまま
         original_name,
@@ -28,36 +201,98 @@ def fetch_company_url(company_name):
         re.sub(r'[\s\.,\-_]', '', original_name.lower()),
     ]
     
-    # 1. 拡張されたドメイン推測（複数のクリーニングパターンを使用）
+    candidates = []
+    seen = set()
     for clean_name in clean_patterns:
         if not clean_name:
             continue
             
-        # より多くのドメインパターンを試行
-        domain_patterns = [
-            f"{clean_name}.com",
-            f"{clean_name}.co.jp", 
-            f"{clean_name}.jp",
-            f"{clean_name}.net",
-            f"{clean_name}.org",
-            f"{clean_name}.info",
-            f"{clean_name}.biz",
-            f"{clean_name}-corp.com",
-            f"{clean_name}corp.com",
-            f"www.{clean_name}.com",
-        ]
-        
-        for domain in domain_patterns:
+        for pattern in DOMAIN_PATTERNS:
+            domain = pattern.format(name=clean_name)
             for protocol in ['https://', 'http://']:
-                try:
-                    url = f"{protocol}{domain}"
-                    response = requests.head(url, timeout=3, allow_redirects=True)
-                    if response.status_code == 200:
-                        return response.url
-                except:
-                    continue
+                url = f"{protocol}{domain}"
+                if url not in seen:
+                    seen.add(url)
+                    candidates.append((url, pattern))
+    return candidates
+
+def _combined_candidates(original_name):
+    """
+    4. 会社名から推測される代替ドメインパターンの候補URL
+    """
+    # 会社名の一部を使った推測
+    name_parts = re.findall(r'\w+', original_name.lower())
+    if len(name_parts) < 2:
+        return []
+    combined_patterns = [
+        f"{''.join(name_parts[:2])}.com",
+        f"{''.join(name_parts[:2])}.co.jp",
+        f"{name_parts[0]}{name_parts[-1]}.com",
+        f"{name_parts[0]}.co.jp",
+    ]
+    return _dedupe(
+        f"{protocol}www.{domain}"
+        for domain in combined_patterns
+        for protocol in ['https://', 'http://']
+    )
+
+def _fallback_candidates(original_name):
+    """
+    5. 最後の手段：より寛容なドメイン推測の候補URL
+    """
+    base_name = re.sub(r'[^\w]', '', original_name.lower())
+    if len(base_name) < 3:
+        return []
+    fallback_patterns = [
+        f"{base_name[:10]}.com",  # 名前の最初の10文字
+        f"{base_name[:5]}.co.jp",  # 名前の最初の5文字
+        f"{base_name}.net",
+        f"{base_name}.org",
+    ]
+    return _dedupe(
+        f"{protocol}{domain}"
+        for domain in fallback_patterns
+        for protocol in ['https://', 'http://']
+    )
+
+def _name_class(original_name):
+    """統計を分ける会社名の種類（日本語を含むかどうか）"""
+    return "ja" if re.search(r'[^\x00-\x7f]', original_name) else "en"
+
+def _hit_rate(stats, name):
+    """試行回数が少ないうちは差がつかないよう平滑化した成功率"""
+    attempts, wins = stats.get(name, (0, 0))
+    if attempts < MIN_SAMPLES:
+        return 0.0
+    return (wins + 1) / (attempts + 2)
+
+def _strategy_domain_guess(ctx, budget):
+    """1. 拡張されたドメイン推測（過去によく当たったドメインパターンから順に並べる）"""
+    name_class = ctx["name_class"]
+    stats = get_cache().outcome_stats(f"pattern:{name_class}")
+    candidates = sorted(ctx["domain_candidates"], key=lambda c: -_hit_rate(stats, c[1]))
+    pattern_of = dict(candidates)
+    
+    started = time.monotonic()
+    urls = ctx["dns"].filter_urls([url for url, _ in candidates], timeout=min(RESOLVE_TIMEOUT, budget),
+                                 incomplete=ctx["incomplete"])
+    remaining = budget - (time.monotonic() - started)
+    probe = _cached(_probe_head_ok, ctx["original_name"])
+    
+    def tagged_probe(url, cancel_event):
+        result = probe(url, cancel_event)
+        return (result, url) if result else None
     
-    # 2. より効果的なGoogle検索（複数のクエリパターン）
+    winner = race(urls, tagged_probe, timeout=max(remaining, 0), incomplete=ctx["incomplete"])
+    if winner is None:
+        return None
+    result, url = winner
+    get_cache().record_outcome(f"pattern:{name_class}", sorted(set(pattern_of.values())), pattern_of[url])
+    return result
+
+def _strategy_google(ctx, budget):
+    """2. より効果的なGoogle検索（複数のクエリパターンを同時に取得）"""
+    original_name = ctx["original_name"]
     search_patterns = [
         f'"{original_name}" site:*.com OR site:*.co.jp OR site:*.jp',
         f'{original_name} 公式サイト',
@@ -66,124 +301,150 @@ def fetch_company_url(company_name):
         f'{original_name} 会社概要',
     ]
     
-    for search_query in search_patterns:
+    started = time.monotonic()
+    executor = get_executor()
+    futures = [executor.submit(_search_google, q, original_name, min(8, budget)) for q in search_patterns]
+    wait(futures, timeout=budget)
+    candidates = []
+    for future in futures:
+        if not future.done():
+            future.cancel()
+            ctx["incomplete"].set()
+            continue
         try:
-            encoded_query = quote(search_query)
-            search_url = f"https://www.google.com/search?q={encoded_query}&num=10"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'ja,en-US;q=0.7,en;q=0.3',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
-            }
-            
-            response = requests.get(search_url, headers=headers, timeout=8)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # より多くのGoogle検索結果パターンを検索
-                link_selectors = [
-                    'a[href*="/url?q="]',
-                    'a[href^="http"]',
-                    '.yuRUbf a',
-                    '.kCrYT a',
-                ]
-                
-                found_urls = set()
-                for selector in link_selectors:
-                    for link in soup.select(selector):
-                        href = link.get('href', '')
-                        if '/url?q=' in href:
-                            try:
-                                actual_url = unquote(href.split('/url?q=')[1].split('&')[0])
-                                found_urls.add(actual_url)
-                            except:
-                                continue
-                        elif href.startswith('http'):
-                            found_urls.add(href)
-                
-                # URLの品質でソート
-                for url in sorted(found_urls, key=lambda x: score_url_quality(x, original_name), reverse=True):
-                    if is_valid_company_url(url, original_name):
-                        if validate_url_quick(url):
-                            return url
-                            
-        except Exception as e:
+            candidates.extend(url for url in future.result() if is_valid_company_url(url, original_name))
+        except HostBlocked:
+            ctx["incomplete"].set()
+        except RateLimited:
+            # 自前の流量制限で送らなかったクエリは結果なしとして扱う
             continue
     
-    # 3. Yahoo!検索（日本企業に特に有効）
+    remaining = budget - (time.monotonic() - started)
+    return race(_dedupe(candidates), _cached(_probe_validate, ctx["original_name"]), timeout=max(remaining, 0),
+                incomplete=ctx["incomplete"])
+
+def _strategy_yahoo(ctx, budget):
+    """3. Yahoo!検索（日本企業に特に有効）"""
+    original_name = ctx["original_name"]
+    started = time.monotonic()
+    future = get_executor().submit(_search_yahoo, original_name, min(6, budget))
+    wait([future], timeout=budget)
+    if not future.done():
+        future.cancel()
+        ctx["incomplete"].set()
+        return None
     try:
-        search_query = f"{original_name} 公式サイト"
-        encoded_query = quote(search_query)
-        yahoo_url = f"https://search.yahoo.co.jp/search?p={encoded_query}"
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(yahoo_url, headers=headers, timeout=6)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            for link in soup.find_all('a', href=True):
-                href = link.get('href', '')
-                if href.startswith('http') and is_valid_company_url(href, original_name):
-                    if validate_url_quick(href):
-                        return href
-                        
-    except Exception as e:
-        pass
+        candidates = [href for href in future.result() if is_valid_company_url(href, original_name)]
+    except HostBlocked:
+        ctx["incomplete"].set()
+        return None
+    except RateLimited:
+        return None
+    remaining = budget - (time.monotonic() - started)
+    return race(_dedupe(candidates), _cached(_probe_validate, ctx["original_name"]), timeout=max(remaining, 0),
+                incomplete=ctx["incomplete"])
+
+def _strategy_combined(ctx, budget):
+    """4. 会社名から推測される代替ドメインパターン"""
+    started = time.monotonic()
+    urls = ctx["dns"].filter_urls(ctx["combined_candidates"], timeout=min(RESOLVE_TIMEOUT, budget),
+                                  incomplete=ctx["incomplete"])
+    remaining = budget - (time.monotonic() - started)
+    return race(urls, _cached(_probe_validate, ctx["original_name"]), timeout=max(remaining, 0),
+                incomplete=ctx["incomplete"])
+
+def _strategy_fallback(ctx, budget):
+    """5. 最後の手段：より寛容なドメイン推測"""
+    started = time.monotonic()
+    urls = ctx["dns"].filter_urls(ctx["fallback_candidates"], timeout=min(RESOLVE_TIMEOUT, budget),
+                                  incomplete=ctx["incomplete"])
+    remaining = budget - (time.monotonic() - started)
+    return race(urls, _cached(_probe_head_lenient, ctx["original_name"]), timeout=max(remaining, 0),
+                incomplete=ctx["incomplete"])
+
+# 探索戦略（既定の実行順）
+STRATEGIES = [
+    ("domain_guess", _strategy_domain_guess),
+    ("google", _strategy_google),
+    ("yahoo", _strategy_yahoo),
+    ("combined", _strategy_combined),
+    ("fallback", _strategy_fallback),
+]
+# 検索エンジンを使う戦略と、そのホスト（遮断中は戦略ごと飛ばす）
+STRATEGY_HOSTS = {
+    "google": GOOGLE_HOST,
+    "yahoo": YAHOO_HOST,
+}
+
+def _resolve_company_url(company_name, deadline=DEFAULT_DEADLINE):
+    """
+    ネットワークを使って会社名から公式HPのURLを探索する
+    (URL, 結果をキャッシュしてよいか) を返す
+    戦略を飛ばした・時間切れで打ち切った・遮断で確認できなかった候補がある場合は後者がFalse
+    """
     
-    # 4. 会社名から推測される代替ドメインパターン
-    try:
-        # 会社名の一部を使った推測
-        name_parts = re.findall(r'\w+', original_name.lower())
-        if len(name_parts) >= 2:
-            combined_patterns = [
-                f"{''.join(name_parts[:2])}.com",
-                f"{''.join(name_parts[:2])}.co.jp",
-                f"{name_parts[0]}{name_parts[-1]}.com",
-                f"{name_parts[0]}.co.jp",
-            ]
-            
-            for domain in combined_patterns:
-                for protocol in ['https://', 'http://']:
-                    try:
-                        url = f"{protocol}www.{domain}"
-                        if validate_url_quick(url):
-                            return url
-                    except:
-                        continue
-                        
-    except Exception as e:
-        pass
+    started = time.monotonic()
+    original_name = company_name.strip()
+    name_class = _name_class(original_name)
     
-    # 5. 最後の手段：より寛容なドメイン推測
-    try:
-        base_name = re.sub(r'[^\w]', '', original_name.lower())
-        if len(base_name) >= 3:
-            fallback_patterns = [
-                f"{base_name[:10]}.com",  # 名前の最初の10文字
-                f"{base_name[:5]}.co.jp",  # 名前の最初の5文字
-                f"{base_name}.net",
-                f"{base_name}.org",
-            ]
-            
-            for domain in fallback_patterns:
-                for protocol in ['https://', 'http://']:
-                    try:
-                        url = f"{protocol}{domain}"
-                        response = requests.head(url, timeout=2, allow_redirects=True)
-                        if response.status_code in [200, 301, 302]:
-                            return response.url
-                    except:
-                        continue
-    except:
-        pass
+    ctx = {
+        "original_name": original_name,
+        "name_class": name_class,
+        "dns": get_dns_cache(),
+        "domain_candidates": _domain_guess_candidates(original_name),
+        "combined_candidates": _combined_candidates(original_name),
+        "fallback_candidates": _fallback_candidates(original_name),
+        # 遮断・時間切れで確認できなかった候補があればセットする（プローブのスレッドからもセットされる）
+        "incomplete": threading.Event(),
+    }
     
-    return None
+    # 推測したホストはまとめて名前解決を始めておき、存在しないものにはHTTPプローブを送らない
+    ctx["dns"].resolve_many(
+        [urlsplit(url).hostname for url, _ in ctx["domain_candidates"]]
+        + [urlsplit(url).hostname for url in ctx["combined_candidates"] + ctx["fallback_candidates"]],
+        timeout=0
+    )
+    
+    # 過去の成功率が高い戦略から順に試す（統計が少ないうちは既定の順）
+    scope = f"strategy:{name_class}"
+    stats = get_cache().outcome_stats(scope)
+    strategies = sorted(STRATEGIES, key=lambda s: -_hit_rate(stats, s[0]))
+    
+    # 遮断中の検索エンジンを使う戦略は待機時間が過ぎるまで飛ばす
+    guard = get_host_guard()
+    skipped = [name for name, _ in strategies if name in STRATEGY_HOSTS and guard.is_open(STRATEGY_HOSTS[name])]
+    for name in skipped:
+        metrics.incr("url_strategy_skipped_total", strategy=name)
+    strategies = [s for s in strategies if s[0] not in skipped]
+    
+    attempted = []
+    for i, (name, strategy) in enumerate(strategies):
+        remaining = deadline - DEADLINE_MARGIN - (time.monotonic() - started)
+        if remaining <= 0:
+            # 試していない戦略が残っているので「見つからなかった」とは確定しない
+            get_cache().record_outcome(scope, attempted)
+            return None, False
+        # 早く終わった戦略の残り時間は次の戦略に回す（後の戦略の最低限の時間だけ残して残り時間を使ってよい）
+        reserved = MIN_STRATEGY_BUDGET * (len(strategies) - i - 1)
+        budget = max(remaining - reserved, min(remaining, MIN_STRATEGY_BUDGET))
+        attempted.append(name)
+        try:
+            with metrics.timer("url_strategy_seconds", strategy=name):
+                result = strategy(ctx, budget)
+        except HostBlocked:
+            ctx["incomplete"].set()
+            result = None
+        except Exception:
+            result = None
+        if result:
+            metrics.incr("url_winner_total", strategy=name)
+            get_cache().record_outcome(scope, attempted, name)
+            # 上位の候補を確認できていない場合は、より良い結果があり得るのでキャッシュしない
+            return result, not ctx["incomplete"].is_set()
+    
+    get_cache().record_outcome(scope, attempted)
+    # 飛ばした戦略や確認できなかった候補がある場合は、見つからなかった結果をキャッシュしない
+    return None, not skipped and not ctx["incomplete"].is_set()
 
 def score_url_quality(url, company_name):
     """
@@ -244,7 +505,7 @@ def validate_url_quick(url):
     URLの有効性を素早くチェック
     """
     try:
-        response = requests.head(url, timeout=3, allow_redirects=True)
+        response = instrumented_request("validate", "HEAD", url, timeout=3, allow_redirects=True)
         return response.status_code in [200, 301, 302]
     except:
         return False
@@ -253,13 +514,43 @@ def validate_url(url):
     """
     URLが有効かどうかを確認する（詳細版）
     """
+    return check_url(url)["ok"]
+
+def check_url(url, etag=None, last_modified=None, stage="validate_full"):
+    """
+    URLを確認し、結果と次回の条件付きリクエスト用のETag・Last-Modifiedを返す
+    etag・last_modified を渡すと変更がない場合は304（本文なし）で済む
+    流量制限・遮断でリクエストを送れなかった場合は skipped がTrueになる（URLの良し悪しは判定していない）
+    戻り値: {"ok", "status", "not_modified", "etag", "last_modified", "skipped"}
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    result = {"ok": False, "status": None, "not_modified": False, "etag": etag, "last_modified": last_modified,
+              "skipped": False}
     try:
-        response = requests.head(url, timeout=5, allow_redirects=True)
-        return response.status_code == 200
-    except:
+        response = instrumented_request(stage, "HEAD", url, headers=headers, timeout=5, allow_redirects=True)
+    except (HostBlocked, RateLimited):
+        result["skipped"] = True
+        return result
+    except requests.RequestException:
+        response = None
+    if response is None or response.status_code not in (200, 304):
         try:
             # HEAD requestが失敗した場合はGET requestを試行
-            response = requests.get(url, timeout=5, stream=True)
-            return response.status_code == 200
-        except:
-            return False
+            response = instrumented_request(stage, "GET", url, headers=headers, timeout=5, stream=True)
+            response.close()
+        except (HostBlocked, RateLimited):
+            result["skipped"] = True
+            return result
+        except requests.RequestException:
+            return result
+    result["status"] = response.status_code
+    result["not_modified"] = response.status_code == 304
+    result["ok"] = response.status_code in (200, 304)
+    if response.status_code == 200:
+        result["etag"] = response.headers.get("ETag")
+        result["last_modified"] = response.headers.get("Last-Modified")
+    return result
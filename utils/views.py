@@ -0,0 +1,215 @@
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from utils.duplicate_index import DuplicateIndex
+from utils.models import Startup, Status
+from utils.search_index import SearchIndex
+
+# ステータス一覧（表示順）
+STATUSES = [status.value for status in Status]
+# アクティブ案件の定義（保留を含む）
+ACTIVE_STATUSES = [Status.INITIAL_CONTACT.value, Status.NEGOTIATING.value, Status.ON_HOLD.value]
+COMPLETED_STATUSES = [Status.WON.value, Status.DECLINED.value]
+
+
+class DerivedViews:
+    """
+    一覧から派生する集計（ステータス別の振り分け・件数・成約率・平均経過日数）
+    全件を1回走査して作成し、データのバージョンが変わるまで使い回す
+    （バックグラウンドの差分の反映は振り分けや索引をその場で書き換えるので、読み出しもロックの中で行う）
+    """
+
+    def __init__(self):
+        # 作り直しと差分の反映は、バックグラウンドのスレッドからも行われるのでこのロックの中で行う
+        self.lock = threading.RLock()
+        self.version = None
+        self.buckets: Dict[str, List[Startup]] = {}
+        self.total = 0
+        self.search_index = SearchIndex()
+        self.duplicate_index = DuplicateIndex()
+        # アクティブ案件の作成日時の合計（平均経過日数の計算用）
+        self._active_created_sum = 0.0
+        self._active_dated = 0
+
+    def rebuild(self, startups: List[Startup], version):
+        self.buckets = {}
+        self.total = 0
+        self.search_index = SearchIndex()
+        self.duplicate_index = DuplicateIndex()
+        self._active_created_sum = 0.0
+        self._active_dated = 0
+        for startup in startups:
+            self._add(startup)
+        self.version = version
+
+    def _add(self, startup: Startup):
+        self.buckets.setdefault(startup["status"], []).append(startup)
+        self.total += 1
+        self.search_index.add(startup)
+        self.duplicate_index.add(startup)
+        if startup["status"] in ACTIVE_STATUSES:
+            created = startup.created_ts
+            if created is not None:
+                self._active_created_sum += created
+                self._active_dated += 1
+
+    def _remove(self, startup: Startup):
+        bucket = self.buckets.get(startup["status"], [])
+        for i, s in enumerate(bucket):
+            if s.get("id") == startup.get("id"):
+                del bucket[i]
+                break
+        else:
+            return
+        if not bucket:
+            del self.buckets[startup["status"]]
+        self.total -= 1
+        self.search_index.remove(startup)
+        self.duplicate_index.remove(startup)
+        if startup["status"] in ACTIVE_STATUSES:
+            created = startup.created_ts
+            if created is not None:
+                self._active_created_sum -= created
+                self._active_dated -= 1
+
+    def _replace(self, old: Startup, new: Startup):
+        if old["status"] != new["status"]:
+            self._remove(old)
+            self._add(new)
+            return
+        # ステータスが同じなら並び順を保ったまま差し替える
+        bucket = self.buckets.get(old["status"], [])
+        for i, s in enumerate(bucket):
+            if s.get("id") == old.get("id"):
+                bucket[i] = new
+                break
+        else:
+            return
+        # 索引は同じIDのレコードを置き換える
+        self.search_index.add(new)
+        self.duplicate_index.add(new)
+        if new["status"] in ACTIVE_STATUSES:
+            for startup, sign in ((old, -1), (new, 1)):
+                created = startup.created_ts
+                if created is not None:
+                    self._active_created_sum += sign * created
+                    self._active_dated += sign
+
+    def apply_add(self, startup: Startup, previous_version, version):
+        """追加を差分で反映する（途中で他の変更があった場合は次回に作り直す）"""
+        with self.lock:
+            if self.version != previous_version:
+                self.version = None
+                return
+            self._add(startup)
+            self.version = version
+
+    def apply_delete(self, startup: Startup, previous_version, version):
+        """削除を差分で反映する（途中で他の変更があった場合は次回に作り直す）"""
+        with self.lock:
+            if self.version != previous_version:
+                self.version = None
+                return
+            self._remove(startup)
+            self.version = version
+
+    def apply_patch(self, changed: List[Tuple[Optional[Startup], Startup]], previous_version, version):
+        """
+        一部の項目の更新（SharedDataset.patch の結果）を差分で反映する
+        （途中で他の変更があった場合や、一覧になかったレコードがある場合は次回に作り直す）
+        """
+        with self.lock:
+            if self.version != previous_version or any(old is None for old, _ in changed):
+                self.version = None
+                return
+            for old, new in changed:
+                self._replace(old, new)
+            self.version = version
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        with self.lock:
+            return {status: len(bucket) for status, bucket in self.buckets.items()}
+
+    @property
+    def statuses(self) -> List[str]:
+        """件数が1件以上あるステータス（既定の順、未知のステータスは末尾）"""
+        with self.lock:
+            known = [status for status in STATUSES if status in self.buckets]
+            return known + [status for status in self.buckets if status not in STATUSES]
+
+    def count(self, status: str) -> int:
+        with self.lock:
+            return len(self.buckets.get(status, []))
+
+    def filter(self, statuses: List[str]) -> List[Startup]:
+        """指定したステータスのレコードを返す"""
+        result = []
+        with self.lock:
+            for status in statuses:
+                result.extend(self.buckets.get(status, []))
+        return result
+
+    def search(self, query: str, statuses: Optional[List[str]] = None) -> Tuple[List[Startup], bool]:
+        """会社名で曖昧検索し、(関連度順のレコード, 候補を打ち切ったか) を返す"""
+        with self.lock:
+            return self.search_index.search(query, statuses)
+
+    def find_duplicate(self, company_name: str, hp: Optional[str] = None) -> Optional[Startup]:
+        """同じ会社と思われる既存レコードを返す（なければNone）"""
+        with self.lock:
+            return self.duplicate_index.find(company_name, hp)
+
+    @property
+    def active(self) -> List[Startup]:
+        return self.filter(ACTIVE_STATUSES)
+
+    @property
+    def completed(self) -> List[Startup]:
+        return self.filter(COMPLETED_STATUSES)
+
+    @property
+    def active_count(self) -> int:
+        with self.lock:
+            return sum(self.count(status) for status in ACTIVE_STATUSES)
+
+    @property
+    def completed_count(self) -> int:
+        with self.lock:
+            return sum(self.count(status) for status in COMPLETED_STATUSES)
+
+    @property
+    def completion_rate(self) -> float:
+        """完了案件に占める成約の割合（%）"""
+        with self.lock:
+            if not self.completed_count:
+                return 0.0
+            return self.count("成約") / self.completed_count * 100
+
+    @property
+    def avg_active_days(self) -> float:
+        """アクティブ案件の平均経過日数（作成日のないレコードは0日として扱う）"""
+        with self.lock:
+            if not self.active_count:
+                return 0
+            total_seconds = self._active_dated * time.time() - self._active_created_sum
+            return round(total_seconds / 86400 / self.active_count, 1)
+
+
+_views = DerivedViews()
+
+
+def get_views(startups: List[Startup], version) -> DerivedViews:
+    """
+    全セッション共有の集計を返す（バージョンが変わっていれば作り直す）
+    """
+    with _views.lock:
+        if _views.version != version:
+            _views.rebuild(startups, version)
+    return _views
+
+
+def shared_views() -> DerivedViews:
+    """全セッション共有の集計を作り直さずに返す（バックグラウンドの更新を差分で反映する用）"""
+    return _views